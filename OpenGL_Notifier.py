@@ -8,10 +8,18 @@ bl_info = {
     "category": "Render",
 }
 
-import bpy, time, platform, subprocess, shutil, json, urllib.request, urllib.error, os
-from bpy.types import AddonPreferences, Operator
-from bpy.props import StringProperty, BoolProperty, FloatProperty
-from pathlib import Path
+import time, platform, subprocess, shutil, json, urllib.parse, http.client, ssl, os, re, sys, types, socket
+import threading, queue, select, struct, itertools, heapq, array, hashlib, uuid, tempfile
+import concurrent.futures, random, functools, base64, collections, zlib
+
+# Everything up to the "Blender add-on" section is plain Python and also runs
+# headless (python -m OpenGL_Notifier watch ...); bpy is only needed below it.
+try:
+    import bpy
+    from bpy.types import AddonPreferences, Operator
+    from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty, IntProperty
+except ImportError:
+    bpy = None
 
 # ---------------------------
 # Helpers: prefs access
@@ -27,40 +35,58 @@ def _prefs():
     aid = _addon_idname()
     return bpy.context.preferences.addons[aid].preferences
 
-# ---------------------------
-# Discord + Desktop notify
-# ---------------------------
-    
-def _notify_local(msg):
-    prefs = _prefs()
+# Immutable snapshot of the preferences (a _Config). It is rebuilt by the
+# properties' update callbacks on the main thread; everything else, worker
+# threads included, only reads it and never goes through bpy for settings.
+_CONFIG = None
 
-    # Sound (Windows)
-    if prefs.enable_sound:
-        if prefs.enable_custom_sound and prefs.custom_sound_path:
-            _play_custom_sound(prefs.custom_sound_path)
-        else:
-            _play_only_sound()
+def _config():
+    """The current preferences snapshot (built on first use)."""
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = _snapshot(_prefs())
+    return _CONFIG
 
-    # Popup (Windows)
-    if prefs.enable_toast:
-        _popup_only(msg)
+def _config_changed(self, context):
+    global _CONFIG
+    _CONFIG = _snapshot(self)
 
-def _notify_local(msg):
-    pf = _prefs()
-
-    # --- Sound ---
-    if pf.enable_sound:
-        if pf.enable_custom_sound and pf.custom_sound_path:
-            _play_custom_sound(pf.custom_sound_path)
-        else:
-            _play_only_sound()
-
-    # --- Popup ---
-    if pf.enable_toast:
-        _popup_only(msg)
+_DISCORD_TIMEOUT = 15.0   # per-request timeout (s) unless the target sets one
 
+def _discord_target(url: str, username: str, avatar: str = "", timeout: float = _DISCORD_TIMEOUT):
+    """Webhook settings for the delivery worker (with the prebuilt payload base), or None without a URL."""
+    url, avatar = url.strip(), (avatar or "").strip()
+    if not url:
+        return None
+    base = {"username": username}
+    if avatar:
+        base["avatar_url"] = avatar
+    return {"url": url, "username": username, "avatar_url": avatar, "base": base, "timeout": timeout}
+
+def _snapshot(pf):
+    """Build a _Config from the preferences, resolving URLs/paths and the Discord payload base."""
+    values = {name: getattr(pf, name) for name in _PREF_NAMES}
+    target = None
+    if pf.enable_discord and not pf.enable_hub:   # with a hub, the hub posts the card
+        target = _discord_target(pf.webhook_url or "", pf.discord_username, pf.discord_avatar_url,
+                                 pf.sink_timeout)
+    hub = (pf.hub_address or "").strip()
+    if hub and ":" not in hub:
+        hub = f"{hub}:{_HUB_PORT}"
+    json_url  = (pf.json_webhook_url or "").strip()
+    slack_url = (pf.slack_webhook_url or "").strip()
+    return _Config(
+        discord_target=target,
+        json_webhook=json_url if pf.enable_json_webhook else "",
+        slack_webhook=slack_url if pf.enable_slack else "",
+        event_log=bpy.path.abspath(pf.jsonl_path) if (pf.enable_jsonl and pf.jsonl_path) else "",
+        hub=hub if pf.enable_hub else "",
+        **values,
+    )
 
+# ---------------------------
 # Operating System Dependent Notifications
+# ---------------------------
 
 def _play_only_sound():
     """Simple cross-platform notification sound."""
@@ -216,40 +242,405 @@ def _popup_only(msg="OpenGL Render Complete"):
         except Exception:
             pass
 
-# --- Discord post (balanced try/except, with clear logs) ---
-def _post_discord(content: str):
-    prefs = _prefs()
-    url = (prefs.webhook_url or "").strip()
-    if not prefs.enable_discord or not url:
-        return
-
-    payload = {"username": prefs.discord_username, "content": content}
-    ava = (prefs.discord_avatar_url or "").strip()
-    if ava:
-        payload["avatar_url"] = ava
-
-    data = json.dumps(payload).encode("utf-8")
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        # Look like a real browser to avoid Cloudflare 1010
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/120.0.0.0 Safari/537.36"),
+# ---------------------------
+# Desktop helper (one long-lived process instead of one per alert)
+# ---------------------------
+# Line protocol on the helper's stdin, one alert per line: "<op>\t<arg>\n" with
+# op "toast" (arg = message), "beep" (no arg) or "sound" (arg = file path).
+# OPENGL_NOTIFIER_HELPER replaces the platform helper with any command that
+# reads that protocol (e.g. a stub that logs the lines, for headless tests).
+
+_PS_HELPER = r"""
+$ErrorActionPreference = 'SilentlyContinue'
+$toast = [bool](Import-Module BurntToast -PassThru)
+Add-Type -AssemblyName PresentationCore
+$player = New-Object System.Windows.Media.MediaPlayer
+while (($line = [Console]::In.ReadLine()) -ne $null) {
+    $op, $arg = $line -split "`t", 2
+    switch ($op) {
+        'toast' { if ($toast) { New-BurntToastNotification -Text $arg } }
+        'beep'  { [Console]::Beep(880, 300) }
+        'sound' { $player.Open([uri]$arg); $player.Play() }
     }
+}
+"""
+
+_SH_HELPER = r"""
+TAB=$(printf '\t')
+while IFS="$TAB" read -r op arg; do
+    case "$op" in
+        toast) %(toast)s ;;
+        beep)  %(beep)s ;;
+        sound) %(sound)s ;;
+    esac
+done
+"""
+
+class _DesktopBackend:
+    """Sound + popup alerts through a persistent helper process.
+
+    probe() (at register) looks up the platform and the tools once. The
+    helper is started on the first alert and kept; if it cannot be started,
+    or dies and cannot be restarted, alerts fall back to one process each
+    (_popup_only, _play_only_sound, _play_custom_sound).
+    """
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._proc   = None
+        self._failed = False
+        self.system  = None
+        self.command = None   # helper argv, or None when there is none
+
+    def probe(self):
+        self.system = platform.system()
+        override = os.environ.get("OPENGL_NOTIFIER_HELPER", "").strip()
+        if override:
+            self.command = ["/bin/sh", "-c", override] if self.system != "Windows" else override.split()
+            return
+        which = {t: shutil.which(t) for t in ("powershell", "notify-send", "osascript",
+                                              "ffplay", "afplay", "paplay", "aplay")}
+        if self.system == "Windows":
+            ps = which["powershell"]
+            script = base64.b64encode(_PS_HELPER.encode("utf-16-le")).decode("ascii")
+            self.command = [ps, "-NoProfile", "-ExecutionPolicy", "Bypass", "-EncodedCommand", script] if ps else None
+            return
+
+        if which["notify-send"]:
+            toast = 'notify-send "Blender (OpenGL Notifier)" "$arg" &'
+        elif which["osascript"]:
+            toast = ("osascript -e 'on run argv' -e 'display notification (item 1 of argv) "
+                     "with title \"Blender (OpenGL Notifier)\"' -e 'end run' \"$arg\" &")
+        else:
+            toast = ":"
+        if which["ffplay"]:
+            sound = 'ffplay -nodisp -autoexit -loglevel quiet "$arg" </dev/null >/dev/null 2>&1 &'
+        else:
+            player = next((t for t in ("afplay", "paplay", "aplay") if which[t]), None)
+            sound = f'{player} "$arg" >/dev/null 2>&1 &' if player else ":"
+        if self.system == "Darwin" and which["afplay"]:
+            beep = "afplay /System/Library/Sounds/Glass.aiff &"
+        elif which["paplay"]:
+            beep = "paplay /usr/share/sounds/freedesktop/stereo/complete.oga >/dev/null 2>&1 &"
+        elif which["aplay"]:
+            beep = "aplay /usr/share/sounds/alsa/Front_Center.wav >/dev/null 2>&1 &"
+        else:
+            beep = ":"
+        self.command = ["/bin/sh", "-c", _SH_HELPER % {"toast": toast, "beep": beep, "sound": sound}]
 
-    try:
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            code = resp.getcode()
-            print(f"[OpenGL Notifier] Discord HTTP {code}")
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="ignore")
-        print(f"[OpenGL Notifier] Discord HTTPError {e.code}: {body}")
-    except urllib.error.URLError as e:
-        print(f"[OpenGL Notifier] Discord URLError: {e.reason}")
-    except Exception as e:
-        print("[OpenGL Notifier] Discord unexpected error:", e)
+    def toast(self, msg: str):
+        if not self._send("toast", msg):
+            _popup_only(msg)
+
+    def beep(self):
+        if self.system == "Windows":
+            _play_only_sound()   # winsound, in-process already
+        elif not self._send("beep"):
+            _play_only_sound()
+
+    def sound(self, path: str):
+        if not path or not os.path.isfile(path):
+            return
+        if not self._send("sound", path):
+            _play_custom_sound(path)
+
+    def _start(self):
+        kw = {}
+        if self.system == "Windows":
+            kw["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self._proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL, **kw)
+
+    def _send(self, op: str, arg: str = "") -> bool:
+        """Hand one alert to the helper. False if there is no working helper."""
+        if self.system is None:
+            self.probe()
+        if self.command is None or self._failed:
+            return False
+        line = (op + "\t" + arg.replace("\t", " ").replace("\r", " ").replace("\n", " ") + "\n").encode("utf-8")
+        with self._lock:
+            for _ in range(2):   # a helper that died is restarted once
+                try:
+                    if self._proc is None or self._proc.poll() is not None:
+                        self._start()
+                    self._proc.stdin.write(line)
+                    self._proc.stdin.flush()
+                    return True
+                except OSError as e:
+                    print("[OpenGL Notifier] Desktop helper unavailable:", e)
+                    self._proc = None
+            self._failed = True
+            return False
+
+    def stop(self, timeout: float = 1.0):
+        with self._lock:
+            proc, self._proc = self._proc, None
+            self._failed = False
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()   # EOF ends the helper's read loop
+            proc.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+_DESKTOP = _DesktopBackend()
+
+_DISCORD_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "*/*",
+    # Look like a real browser to avoid Cloudflare 1010
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                   "AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/120.0.0.0 Safari/537.36"),
+}
+
+class _HTTPPool:
+    """Small keep-alive connection pool keyed by scheme + host + port.
+
+    Saves the TCP + TLS handshake on every webhook call. Idle connections are
+    dropped after IDLE_TIMEOUT, or when the server has already closed them,
+    and a request on a reused connection that turns out to be dead is sent
+    once more on a fresh one.
+    """
+    IDLE_TIMEOUT = 60.0
+    MAX_IDLE     = 4   # per host
+
+    def __init__(self):
+        self._idle = {}   # (scheme, host, port) -> [(connection, last used)]
+        self._lock = threading.Lock()
+        self._ssl  = None
+
+    def _connect(self, key, timeout: float):
+        scheme, host, port = key
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl)
+        if scheme == "http":
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+        raise ValueError(f"Unsupported URL scheme: {scheme!r}")
+
+    def _checkout(self, key, timeout: float):
+        """Return (connection, reused)."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last = idle.pop()
+                sock = conn.sock
+                # A readable idle socket means the server sent EOF (or junk): drop it
+                if sock is None or now - last > self.IDLE_TIMEOUT or select.select([sock], [], [], 0)[0]:
+                    conn.close()
+                    continue
+                conn.timeout = timeout
+                sock.settimeout(timeout)
+                return conn, True
+        return self._connect(key, timeout), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.MAX_IDLE:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, body: bytes = None, headers: dict = None, timeout: float = 15.0):
+        """Send a request and read the whole response. Returns (status, headers, body).
+
+        Raises OSError / http.client.HTTPException if no response could be read.
+        """
+        parts = urllib.parse.urlsplit(url)
+        key   = (parts.scheme, parts.hostname, parts.port)
+        path  = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+        while True:
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused:
+                    continue  # stale keep-alive connection; retry on a new one
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return resp.status, resp.headers, data
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+_HTTP_POOL = _HTTPPool()
+
+class _RateLimiter:
+    """Discord rate-limit bookkeeping shared by all webhook traffic.
+
+    Every webhook gets a local token bucket (Discord allows about 5 requests
+    per 2 s per webhook, shared by everyone posting to it), and every
+    webhook + route remembers what the last response reported through
+    X-RateLimit-Remaining / X-RateLimit-Reset-After. A 429 blocks the route,
+    or all routes for a global limit, for its retry_after.
+    """
+    BURST = 5
+    RATE  = 5 / 2.0   # tokens per second
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._tokens = {}   # webhook -> [tokens, last refill]
+        self._routes = {}   # (webhook, route) -> [remaining, reset at]
+        self._global_until = 0.0
+        self.counters = {"sent": 0, "throttled": 0, "deferred": 0, "rate_limited": 0, "retried": 0}
+
+    @staticmethod
+    def key(method: str, url: str):
+        """(webhook, route) for a request; all message edits of a webhook share a route."""
+        base = url.split("?", 1)[0]
+        base, edit, _ = base.partition("/messages/")
+        return base, method + (" messages" if edit else "")
+
+    def delay(self, key, reserve: int = 0) -> float:
+        """Seconds to wait before sending on `key` while leaving `reserve` requests spare."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(self._global_until - now, 0.0)
+            tokens, last = self._tokens.get(key[0], (self.BURST, now))
+            tokens = min(self.BURST, tokens + (now - last) * self.RATE)
+            self._tokens[key[0]] = [tokens, now]
+            if tokens < 1 + reserve:
+                wait = max(wait, (1 + reserve - tokens) / self.RATE)
+            route = self._routes.get(key)
+            if route and now < route[1] and route[0] <= reserve:
+                wait = max(wait, route[1] - now)
+        return wait
+
+    def acquire(self, key):
+        """Spend one request of the budget on `key` (call right before sending)."""
+        with self._lock:
+            self._tokens[key[0]][0] -= 1
+            route = self._routes.get(key)
+            if route:
+                route[0] -= 1
+            self.counters["sent"] += 1
+
+    def update(self, key, status: int, headers, body: bytes) -> float:
+        """Learn from a response. Returns the retry_after of a 429, else 0."""
+        now = time.monotonic()
+        remaining   = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        with self._lock:
+            if remaining is not None and reset_after is not None:
+                try:
+                    self._routes[key] = [int(remaining), now + float(reset_after)]
+                except ValueError:
+                    pass
+            if status != 429:
+                return 0.0
+
+            self.counters["rate_limited"] += 1
+            try:
+                js = json.loads(body or b"{}")
+            except ValueError:
+                js = {}
+            try:
+                retry_after = float(js.get("retry_after") or headers.get("Retry-After") or 1.0)
+            except (TypeError, ValueError):
+                retry_after = 1.0
+            if js.get("global") or headers.get("X-RateLimit-Global"):
+                self._global_until = now + retry_after
+            else:
+                self._routes[key] = [0, now + retry_after]
+            return retry_after
+
+_RATE_LIMITER = _RateLimiter()
+
+def _multipart(payload: dict, files) -> tuple:
+    """multipart/form-data body for a webhook payload plus (filename, content type, bytes) files."""
+    boundary = "OpenGLNotifier" + uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"payload_json\"\r\n"
+        f"Content-Type: application/json\r\n\r\n".encode("utf-8"),
+        json.dumps(payload).encode("utf-8"), b"\r\n",
+    ]
+    for i, (filename, ctype, data) in enumerate(files):
+        parts += [
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"files[{i}]\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {ctype}\r\n\r\n".encode("utf-8"),
+            data, b"\r\n",
+        ]
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+def _discord_http(method: str, url: str, payload: dict, what: str, retries: int = 0, files=None,
+                  timeout: float = _DISCORD_TIMEOUT):
+    """Send one webhook request, paced by _RATE_LIMITER.
+
+    Waits out the local budget first, and on a 429 sleeps for retry_after and
+    tries again up to `retries` times. `files` turns it into a multipart
+    upload. Returns (status, body); status is 0 if the request never got a
+    response. Runs on the delivery worker thread.
+    """
+    key = _RATE_LIMITER.key(method, url)
+    if files:
+        data, ctype = _multipart(payload, files)
+        headers = dict(_DISCORD_HEADERS, **{"Content-Type": ctype})
+    else:
+        data, headers = json.dumps(payload).encode("utf-8"), _DISCORD_HEADERS
+    status, body = 0, b""
+
+    for attempt in range(retries + 1):
+        wait = _RATE_LIMITER.delay(key)
+        if wait > 0:
+            _RATE_LIMITER.counters["throttled"] += 1
+            time.sleep(wait)
+        _RATE_LIMITER.acquire(key)
+
+        try:
+            status, resp_headers, body = _HTTP_POOL.request(method, url, data, headers, timeout=timeout)
+        except (OSError, http.client.HTTPException) as e:
+            print(f"[OpenGL Notifier] Discord connection error ({what}): {e}")
+            return 0, b""
+        except Exception as e:
+            print(f"[OpenGL Notifier] Discord unexpected error ({what}):", e)
+            return 0, b""
+
+        retry_after = _RATE_LIMITER.update(key, status, resp_headers, body)
+        if status < 400:
+            return status, body
+
+        print(f"[OpenGL Notifier] Discord HTTPError ({what}) {status}: {body.decode('utf-8', errors='ignore')}")
+        if status != 429 or attempt >= retries:
+            break
+        _RATE_LIMITER.counters["retried"] += 1
+        time.sleep(retry_after)
+
+    return status, body
+
+def _discord_payload(target: dict, **fields) -> dict:
+    """Webhook payload: the target's prebuilt display name/avatar plus the given fields."""
+    return {**target["base"], **fields}
+
+# --- Discord post (balanced try/except, with clear logs) ---
+def _post_discord(content: str, target: dict, retries: int = 3) -> bool:
+    payload = _discord_payload(target, content=content)
+    status, _ = _discord_http("POST", target["url"], payload, "message POST", retries,
+                              timeout=target.get("timeout", _DISCORD_TIMEOUT))
+    if status and status < 400:
+        print(f"[OpenGL Notifier] Discord HTTP {status}")
+        return True
+    return False
 
 # ---------------------------
 # Discord embeds (live-updating card)
@@ -258,9 +649,11 @@ def _post_discord(content: str):
 _BLUE  = 0x1E88E5  # in-progress color
 _GREEN = 0x43A047  # completed color
 _RED   = 0xE53935  # canceled / error color
+_PURPLE = 0x8E24AA # encoding color
+_ORANGE = 0xFB8C00 # disk space at risk color
 
 def _discord_build_embed(stage: str, stats: dict) -> dict:
-    """Build a Discord embed for start/progress/done."""
+    """Build a Discord embed for start/progress/encoding/done."""
     job_label   = stats.get("job_label", "Viewport Render")
     job_type    = stats.get("job_type", "Animation")
     total       = stats.get("total_frames", 0)
@@ -289,6 +682,23 @@ def _discord_build_embed(stage: str, stats: dict) -> dict:
         desc  = f"Job type: {job_type}\nRender appears to have been canceled or interrupted."
         color = _RED
 
+    elif stage == "at_risk":
+        title = f"{job_label} — Disk may fill up ⚠️"
+        desc  = (f"Job type: {job_type}\nAt the current frame size the rest of the render needs "
+                 f"{stats.get('disk_need_str', '—')}, but only {stats.get('disk_free_str', '—')} is free.")
+        color = _ORANGE
+
+    elif stage == "encoding":
+        title = f"{job_label} — Encoding {stats.get('encode_format', '')}…"
+        desc  = f"Job type: {job_type}\nAll frames rendered, encoding the output."
+        color = _PURPLE
+
+    elif stats.get("disk_at_risk"):
+        # progress, but the output disk is projected to fill up
+        title = f"{job_label} — Rendering… ⚠️ low disk space"
+        desc  = f"Job type: {job_type}"
+        color = _ORANGE
+
     else:
         # progress
         title = f"{job_label} — Rendering…"
@@ -305,6 +715,15 @@ def _discord_build_embed(stage: str, stats: dict) -> dict:
         {"name": "ETA (remaining)",    "value": eta,                      "inline": True},
         {"name": "Time elapsed",       "value": elapsed,                  "inline": True},
     ]
+    for key, name in (("cpu_str", "CPU"), ("mem_str", "Memory"), ("load_str", "System load"),
+                      ("throughput_str", "Output"), ("disk_str", "Disk")):
+        if key in stats:
+            fields.append({"name": name, "value": stats[key], "inline": True})
+    if "frame_pct_str" in stats:
+        fields.append({"name": "Frame time p50 / p95 / max", "value": stats["frame_pct_str"], "inline": False})
+        fields.append({"name": "Slowest frames", "value": stats["slowest_str"], "inline": False})
+    if "encode_str" in stats:
+        fields.append({"name": f"Encode ({stats.get('encode_format', '')})", "value": stats["encode_str"], "inline": False})
 
     return {
         "title": title,
@@ -314,90 +733,1015 @@ def _discord_build_embed(stage: str, stats: dict) -> dict:
     }
 
 
-def _discord_post_embed(embed: dict):
+def _discord_post_embed(embed: dict, target: dict, retries: int = 3):
     """Create a new Discord message with an embed. Returns message_id or None."""
-    prefs = _prefs()
-    url = (prefs.webhook_url or "").strip()
-    if not prefs.enable_discord or not url:
+    payload = _discord_payload(target, embeds=[embed])
+
+    # Ask Discord to return the created message so we can grab its ID
+    url_wait = target["url"] + "?wait=true"
+
+    status, body = _discord_http("POST", url_wait, payload, "embed POST", retries,
+                                 timeout=target.get("timeout", _DISCORD_TIMEOUT))
+    if not status or status >= 400:
+        return None
+    try:
+        msg_id = json.loads(body.decode("utf-8", errors="ignore") or "{}").get("id")
+        print(f"[OpenGL Notifier] Discord embed created, id={msg_id}")
+        return msg_id
+    except Exception:
+        print("[OpenGL Notifier] Discord: could not parse message id")
         return None
 
-    payload = {"username": prefs.discord_username, "embeds": [embed]}
-    ava = (prefs.discord_avatar_url or "").strip()
-    if ava:
-        payload["avatar_url"] = ava
-
-    data = json.dumps(payload).encode("utf-8")
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/120.0.0.0 Safari/537.36"),
-    }
 
-    # Ask Discord to return the created message so we can grab its ID
-    url_wait = url + "?wait=true"
+def _discord_edit_embed(message_id: str, embed: dict, target: dict, retries: int = 3, image: bytes = None):
+    """Edit an existing Discord message (live update of the same card).
+
+    `image` (JPEG bytes) is uploaded with the edit and shown as the embed image.
+    Returns the edited message (at least {"id": ...}) on success, else None.
+    """
+    if not message_id:
+        return None
 
+    url = f"{target['url']}/messages/{message_id}"
+    files = None
+    if image is not None:
+        embed = dict(embed, image={"url": "attachment://preview.jpg"})
+        files = [("preview.jpg", "image/jpeg", image)]
+    payload = _discord_payload(target, embeds=[embed])
+    if files:
+        payload["attachments"] = [{"id": 0, "filename": "preview.jpg"}]
+
+    status, body = _discord_http("PATCH", url, payload, "embed PATCH", retries, files,
+                                 timeout=target.get("timeout", _DISCORD_TIMEOUT))
+    if not status or status >= 400:
+        return None
+    print(f"[OpenGL Notifier] Discord embed edited HTTP {status}")
     try:
-        req = urllib.request.Request(url_wait, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            body = resp.read().decode("utf-8", errors="ignore") or "{}"
+        return json.loads(body.decode("utf-8", errors="ignore") or "{}") or {"id": message_id}
+    except ValueError:
+        return {"id": message_id}
+
+# ---------------------------
+# Frame previews (small JPEG of the newest frame for the live card)
+# ---------------------------
+class _ByteBudget:
+    """Token bucket in bytes: refills at `rate` bytes/s, holds up to a minute's worth."""
+
+    def __init__(self, rate: float):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate   = rate
+            self.burst  = rate * 60.0
+            self.tokens = self.burst
+            self.last   = time.monotonic()
+
+    def take(self, n: int) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if n > self.tokens:
+                return False
+            self.tokens -= n
+            return True
+
+class _PreviewEncoder:
+    """Decodes and downscales frames to small JPEGs on its own thread, using a local ffmpeg.
+
+    Only the newest requested frame per job is encoded, and a frame that has
+    not changed (same path, mtime and size) is never encoded twice. The result
+    is kept per job with a digest, so the delivery worker can tell whether it
+    was already uploaded.
+    """
+
+    def __init__(self):
+        self._cv      = threading.Condition()
+        self._pending = {}   # job id -> (path, width)
+        self._latest  = {}   # job id -> (digest, jpeg bytes)
+        self._source  = {}   # job id -> (path, mtime, size) of the latest encode
+        self._live    = set()
+        self._thread  = None
+        self._ffmpeg  = None   # resolved on first use
+
+    def available(self) -> bool:
+        if self._ffmpeg is None:
+            self._ffmpeg = shutil.which("ffmpeg") or ""
+            if not self._ffmpeg:
+                print("[OpenGL Notifier] ffmpeg not found; frame previews are disabled.")
+        return bool(self._ffmpeg)
+
+    def request(self, job_id: int, path: str, width: int):
+        if not self.available():
+            return
+        with self._cv:
+            self._pending[job_id] = (path, width)
+            self._live.add(job_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="OpenGLNotifier-preview", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def latest(self, job_id: int):
+        """(digest, jpeg bytes) of the newest preview for a job, or None."""
+        with self._cv:
+            return self._latest.get(job_id)
+
+    def forget(self, job_id: int):
+        with self._cv:
+            self._live.discard(job_id)
+            self._pending.pop(job_id, None)
+            self._latest.pop(job_id, None)
+            self._source.pop(job_id, None)
+
+    def forget_all(self):
+        with self._cv:
+            for job_id in list(self._live):
+                self.forget(job_id)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._pending:
+                    if not self._cv.wait(30.0):
+                        self._thread = None   # idle: let the thread go
+                        return
+                job_id, (path, width) = self._pending.popitem()
             try:
-                js = json.loads(body)
-                msg_id = js.get("id")
-                print(f"[OpenGL Notifier] Discord embed created, id={msg_id}")
-                return msg_id
-            except Exception:
-                print("[OpenGL Notifier] Discord: could not parse message id")
-                return None
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="ignore")
-        print(f"[OpenGL Notifier] Discord HTTPError (embed POST) {e.code}: {body}")
-    except urllib.error.URLError as e:
-        print(f"[OpenGL Notifier] Discord URLError (embed POST): {e.reason}")
-    except Exception as e:
-        print("[OpenGL Notifier] Discord unexpected error (embed POST):", e)
+                self._encode(job_id, path, width)
+            except Exception as e:
+                print("[OpenGL Notifier] Preview encode failed:", e)
+
+    def _encode(self, job_id, path, width):
+        st = os.stat(path)
+        source = (path, st.st_mtime, st.st_size)
+        with self._cv:
+            if self._source.get(job_id) == source:
+                return
+        out = subprocess.run(
+            [self._ffmpeg, "-v", "error", "-i", path, "-vf", f"scale={int(width)}:-2",
+             "-frames:v", "1", "-q:v", "5", "-f", "image2pipe", "-c:v", "mjpeg", "pipe:1"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30,
+        )
+        if out.returncode != 0 or not out.stdout:
+            return
+        with self._cv:
+            if job_id not in self._live:
+                return   # job finished while encoding
+            self._source[job_id] = source
+            self._latest[job_id] = (hashlib.sha1(out.stdout).hexdigest(), out.stdout)
 
-    return None
+_PREVIEWS = _PreviewEncoder()
 
+# ---------------------------
+# Background delivery (all Discord HTTP happens here, never on the UI thread)
+# ---------------------------
+# Fields that change on every tick without anything visible happening to the
+# render (resource samples and free disk space move on their own); an update
+# that differs only in these is not worth a PATCH...
+_VOLATILE_FIELDS  = frozenset({"Time elapsed", "Disk", "CPU", "Memory", "System load"})
+# ...unless the card has not been refreshed for this long (seconds).
+_PROGRESS_REFRESH = 60.0
+
+def _embed_signature(embed: dict) -> str:
+    """Serialized embed minus volatile fields, for skipping unchanged updates."""
+    fields = [f for f in embed.get("fields", ()) if f.get("name") not in _VOLATILE_FIELDS]
+    return json.dumps(dict(embed, fields=fields), sort_keys=True, ensure_ascii=False)
+
+_BACKOFF_BASE = 2.0     # first retry after ~2 s...
+_BACKOFF_CAP  = 300.0   # ...doubling up to ~5 minutes between tries
+_MAX_RETRIES  = 300     # about a day of tries before a message is given up
+
+def _backoff(attempt: int) -> float:
+    """Seconds before retry number `attempt` (0-based): exponential with jitter."""
+    return min(_BACKOFF_BASE * (2 ** attempt), _BACKOFF_CAP) * random.uniform(0.5, 1.5)
+
+def _call_ack(ack):
+    if ack is not None:
+        try:
+            ack()
+        except Exception as e:
+            print("[OpenGL Notifier] Outbox ack failed:", e)
 
-def _discord_edit_embed(message_id: str, embed: dict):
-    """Edit an existing Discord message (live update of the same card)."""
-    if not message_id:
-        return
+class _IntentQueue:
+    """Thread-safe priority queue for delivery intents.
 
-    prefs = _prefs()
-    base_url = (prefs.webhook_url or "").strip()
-    if not prefs.enable_discord or not base_url:
-        return
+    Lower priority values go first, FIFO within a priority. Items can be
+    deferred until a point in time; get() blocks until something is ready.
+    """
 
-    url = f"{base_url}/messages/{message_id}"
-    payload = {"username": prefs.discord_username, "embeds": [embed]}
-    ava = (prefs.discord_avatar_url or "").strip()
-    if ava:
-        payload["avatar_url"] = ava
-
-    data = json.dumps(payload).encode("utf-8")
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/120.0.0.0 Safari/537.36"),
-    }
+    def __init__(self):
+        self._ready    = []   # heap of (priority, seq, item)
+        self._deferred = []   # heap of (not_before, priority, seq, item)
+        self._seq      = itertools.count()
+        self._cv       = threading.Condition()
+
+    def put(self, item, priority: int = 0, not_before: float = 0.0):
+        with self._cv:
+            if not_before > time.monotonic():
+                heapq.heappush(self._deferred, (not_before, priority, next(self._seq), item))
+            else:
+                heapq.heappush(self._ready, (priority, next(self._seq), item))
+            self._cv.notify()
+
+    def get(self):
+        with self._cv:
+            while True:
+                now = time.monotonic()
+                while self._deferred and self._deferred[0][0] <= now:
+                    _, priority, seq, item = heapq.heappop(self._deferred)
+                    heapq.heappush(self._ready, (priority, seq, item))
+                if self._ready:
+                    return heapq.heappop(self._ready)[2]
+                timeout = (self._deferred[0][0] - now) if self._deferred else None
+                self._cv.wait(timeout)
+
+class _DeliveryWorker:
+    """One background thread fed by a queue of delivery intents.
+
+    The timer only enqueues "create" (new card), "update" (edit the job's card,
+    creating it if it does not exist yet) and "text" intents. Message ids of
+    created cards are remembered here so later edits find them, and are handed
+    back to the job state through `results`.
+
+    Progress updates are coalesced per card: only the newest pending embed is
+    kept, and it is dropped if it matches what was last delivered. Terminal
+    updates go through the normal queue and discard any stale progress still
+    waiting for the same card. Once the final update of a card is submitted,
+    progress for it is dropped, including an edit that was in flight and failed.
+
+    Everything but progress is urgent: it is sent first, waits out the rate
+    limit and is retried on 429. Progress edits are deferred while the budget
+    is down to its last request, keeping that one for completion/cancel posts.
+
+    An intent that fails (network down, Discord erroring) is queued again
+    with exponential backoff. Its `ack` callback runs once it is delivered or
+    made redundant, which is what removes it from the outbox.
+
+    A new frame preview rides along with the next progress edit of its card,
+    as long as the upload byte budget allows; otherwise the edit goes out
+    without it.
+    """
+    URGENT, PROGRESS, STOP = 0, 1, 9
+
+    def __init__(self):
+        self.queue       = _IntentQueue()
+        self.results     = queue.SimpleQueue()
+        self.message_ids = {}   # job id -> Discord message id
+        self.counters    = {"coalesced": 0, "unchanged": 0}
+        self._pending    = {}   # job id -> (target, newest progress embed, ack)
+        self._attempts   = {}   # job id -> failed progress deliveries in a row
+        self._delivered  = {}   # job id -> (signature, time) of the last progress delivered
+        self._closed     = set()   # job ids whose final update has been submitted
+        self.preview_urls = {}  # job id -> CDN url of the uploaded preview image
+        self._preview_sent = {} # job id -> digest of the uploaded preview
+        self.preview_budget = _ByteBudget(600 * 1024 / 60.0)
+        self._thread     = None
+        self._lock       = threading.Lock()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="OpenGLNotifier-delivery", daemon=True)
+                self._thread.start()
+
+    def submit(self, kind: str, target, job_id=None, body=None, ack=None, final=False):
+        """Queue an urgent intent; `final` marks the card's last update (done/canceled)."""
+        if target is None:
+            return
+        self._ensure_thread()
+        stale = None
+        if job_id is not None:
+            with self._lock:
+                stale = self._pending.pop(job_id, None)
+                if final:
+                    self._closed.add(job_id)
+        if stale is not None:
+            _call_ack(stale[2])
+        self.queue.put((kind, target, job_id, body, ack, 0), self.URGENT)
+
+    def submit_progress(self, target, job_id, embed: dict, ack=None):
+        """Queue a progress edit; replaces one that is still waiting for the same card."""
+        if target is None:
+            return
+        self._ensure_thread()
+        with self._lock:
+            closed = job_id in self._closed
+            if not closed:
+                stale = self._pending.get(job_id)
+                self._pending[job_id] = (target, embed, ack)
+        if closed:
+            _call_ack(ack)   # the card is already final
+            return
+        if stale is not None:
+            self.counters["coalesced"] += 1
+            _call_ack(stale[2])
+        else:
+            self.queue.put(("progress", target, job_id, None, None, 0), self.PROGRESS)
+
+    def drain_results(self):
+        """Yield (job id, message id) pairs for cards created since the last call."""
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self._deliver(*item)
+            except Exception as e:
+                print("[OpenGL Notifier] Delivery worker error:", e)
+
+    def _deliver(self, kind, target, job_id, body, ack, attempt):
+        if kind == "progress":
+            self._deliver_progress(target, job_id)
+            return
+
+        if kind == "text":
+            ok = _post_discord(body, target)
+        elif kind == "create" and job_id in self.message_ids:
+            ok = True   # a retried create that a later update already covered
+        else:
+            ok = self._send_card(target, job_id, body, edit=(kind == "update"))
+        if ok:
+            _call_ack(ack)
+            return
+        if attempt >= _MAX_RETRIES:
+            print(f"[OpenGL Notifier] Discord {kind} given up after {attempt} retries")
+            _call_ack(ack)
+            return
+        delay = _backoff(attempt)
+        print(f"[OpenGL Notifier] Discord {kind} not delivered; retrying in {delay:.0f}s")
+        self.queue.put((kind, target, job_id, body, ack, attempt + 1), self.URGENT, time.monotonic() + delay)
+
+    def _deliver_progress(self, target, job_id):
+        msg_id = self.message_ids.get(job_id)
+        key = _RATE_LIMITER.key("PATCH" if msg_id else "POST", target["url"] + ("/messages/x" if msg_id else ""))
+        wait = _RATE_LIMITER.delay(key, reserve=1)
+        if wait > 0:
+            # Budget is tight: try again later; the newest embed stays pending
+            _RATE_LIMITER.counters["deferred"] += 1
+            self.queue.put(("progress", target, job_id, None, None, 0), self.PROGRESS, time.monotonic() + wait)
+            return
+
+        with self._lock:
+            pending = self._pending.pop(job_id, None)
+        if pending is None:
+            return  # superseded by a terminal update
+        target, body, ack = pending
+
+        preview = _PREVIEWS.latest(job_id) if msg_id else None
+        if preview is not None and preview[0] == self._preview_sent.get(job_id):
+            preview = None
+        if preview is not None and not self.preview_budget.take(len(preview[1])):
+            preview = None   # over the upload budget; try with a later edit
+
+        sig  = _embed_signature(body)
+        last = self._delivered.get(job_id)
+        if preview is None and last and last[0] == sig and time.time() - last[1] < _PROGRESS_REFRESH:
+            self.counters["unchanged"] += 1
+            _call_ack(ack)
+            return
+
+        if self._send_card(target, job_id, body, edit=True, retries=0, preview=preview):
+            self._delivered[job_id] = (sig, time.time())
+            self._attempts.pop(job_id, None)
+            _call_ack(ack)
+            return
+
+        # Rate limited or failed: put the embed back unless a newer one or the
+        # final update arrived meanwhile, and try again after the rate limit or a backoff
+        wait = _RATE_LIMITER.delay(key)
+        if wait <= 0:
+            attempt = self._attempts.get(job_id, 0)
+            self._attempts[job_id] = attempt + 1
+            wait = _backoff(attempt)
+        with self._lock:
+            if job_id in self._pending or job_id in self._closed:
+                _call_ack(ack)
+                return
+            self._pending[job_id] = (target, body, ack)
+        self.queue.put(("progress", target, job_id, None, None, 0), self.PROGRESS, time.monotonic() + wait)
+
+    def _send_card(self, target, job_id, embed, edit: bool, retries: int = 3, preview=None) -> bool:
+        msg_id = self.message_ids.get(job_id) if edit else None
+        if msg_id:
+            if preview is not None:
+                msg = _discord_edit_embed(msg_id, embed, target, retries, image=preview[1])
+                if msg:
+                    self._preview_sent[job_id] = preview[0]
+                    try:
+                        self.preview_urls[job_id] = msg["embeds"][0]["image"]["url"]
+                    except (KeyError, IndexError, TypeError):
+                        pass
+                return bool(msg)
+            if job_id in self.preview_urls and "image" not in embed:
+                embed = dict(embed, image={"url": self.preview_urls[job_id]})   # keep the picture
+            return bool(_discord_edit_embed(msg_id, embed, target, retries))
+
+        msg_id = _discord_post_embed(embed, target, retries)
+        if msg_id:
+            self.message_ids[job_id] = msg_id
+            self.results.put((job_id, msg_id))
+        return bool(msg_id)
+
+    def stop(self, timeout: float = 2.0):
+        """Let queued messages go out (up to `timeout`), then end the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self.queue.put(None, self.STOP)
+            thread.join(timeout)
+
+_DELIVERY = _DeliveryWorker()
+
+def _delivery_counters() -> dict:
+    """Webhook traffic counters (sent, throttled, deferred, rate_limited, retried, coalesced, unchanged)."""
+    return dict(_RATE_LIMITER.counters, **_DELIVERY.counters)
+
+_JOB_IDS  = itertools.count(1)
+
+# ---------------------------
+# Outbox (events survive network outages and Blender restarts)
+# ---------------------------
+# Append-only JSONL in the user config dir: {"add": id, ...} when an event is
+# handed to a durable sink, {"ack": id} once it is delivered or superseded.
+# Whatever has no ack when the add-on registers again is sent then. A created
+# Discord card is kept as an "add" with its message id under "card", so a later
+# session can still close that card if this one ends before the job does.
+_OUTBOX_MAX_AGE = 24 * 3600.0   # give up on entries older than this
+_SESSION = uuid.uuid4().hex[:8]  # tells this Blender session's job ids from earlier ones
+
+class _Outbox:
+    """Durable record of events that are not delivered yet.
+
+    Writes happen on the calling thread and are flushed right away (terminal
+    events are also fsync'ed). Of the progress events for one sink and job
+    only the newest is kept, so a long outage does not grow the file. Once
+    acked records outnumber pending ones, the file is rewritten with just
+    the pending ones.
+
+    An open card entry (add(..., card=message id)) holds the event that closes
+    the card as canceled; it is acked along with the job's own final event
+    for the same sink.
+    """
+
+    COMPACT_AFTER = 100   # acks before compaction is considered
+    PROGRESS      = ("progress", "encoding")
+    FINAL         = ("done", "canceled")
+    SLOTS         = 16    # instances on one machine that each get their own file
+
+    def __init__(self):
+        self._lock     = threading.RLock()
+        self._path     = None
+        self._file     = None
+        self._entries  = {}   # id -> add record
+        self._progress = {}   # (sink key, session, job id) -> id of the pending progress entry
+        self._cards    = {}   # (sink key, session, job id) -> id of the open card entry
+        self._ids      = itertools.count(1)
+        self._acks     = 0
+        self._claim    = None   # lock file that reserves self._path for this process
+
+    def open(self, folder: str):
+        """Load (and keep appending to) the outbox in `folder`. Returns the records left over.
+
+        Every running instance claims the first outbox file no other process
+        holds, so they never rewrite each other's records; whatever a crashed
+        instance left in its file is picked up by the next one to claim it.
+        """
+        with self._lock:
+            for slot in range(self.SLOTS):
+                name = "outbox.jsonl" if slot == 0 else "outbox-%d.jsonl" % slot
+                self._claim = _try_lock(os.path.join(folder, name + ".lock"))
+                if self._claim is not None:
+                    break
+            else:
+                print("[OpenGL Notifier] All outbox files are in use; keeping this session's in memory")
+                return []
+            self._path = os.path.join(folder, name)
+            last_id = 0
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue   # torn last line after a crash
+                        if "add" in rec:
+                            self._entries[rec["add"]] = rec
+                            last_id = max(last_id, rec["add"])
+                        elif "ack" in rec:
+                            self._entries.pop(rec["ack"], None)
+            except FileNotFoundError:
+                pass
+            self._ids = itertools.count(last_id + 1)
+            for rec in self._entries.values():
+                key = (rec["sink_key"], rec["session"], rec["event"]["job_id"])
+                if "card" in rec:
+                    self._cards[key] = rec["add"]
+                elif rec["event"]["event"] in self.PROGRESS:
+                    old = self._progress.get(key)
+                    if old is None or old < rec["add"]:
+                        self._progress[key] = rec["add"]
+            self._compact()
+            return sorted(self._entries.values(), key=lambda r: r["add"])
+
+    def add(self, sink, event: dict, card=None) -> int:
+        with self._lock:
+            entry_id = next(self._ids)
+            rec = {"add": entry_id, "session": _SESSION, "t": time.time(), "sink_type": sink.name,
+                   "sink": sink.spec(), "sink_key": sink.key, "event": event}
+            if card is not None:
+                rec["card"] = card
+                self._cards[(sink.key, _SESSION, event["job_id"])] = entry_id
+            self._entries[entry_id] = rec
+            self._write(rec, sync=event["event"] not in self.PROGRESS)
+            if card is None and event["event"] in self.PROGRESS:
+                key = (sink.key, _SESSION, event["job_id"])
+                older = self._progress.get(key)
+                self._progress[key] = entry_id
+                if older is not None:
+                    self.ack(older)   # only the newest progress matters
+            return entry_id
+
+    def ack(self, entry_id: int):
+        with self._lock:
+            rec = self._entries.pop(entry_id, None)
+            if rec is None:
+                return
+            key  = (rec["sink_key"], rec["session"], rec["event"]["job_id"])
+            card = None
+            if "card" in rec:
+                if self._cards.get(key) == entry_id:
+                    del self._cards[key]
+            elif rec["event"]["event"] in self.PROGRESS:
+                if self._progress.get(key) == entry_id:
+                    del self._progress[key]
+            elif rec["event"]["event"] in self.FINAL:
+                card = self._cards.pop(key, None)   # the card is closed now
+            self._write({"ack": entry_id})
+            self._acks += 1
+            if card is not None:
+                self.ack(card)
+            if self._acks >= self.COMPACT_AFTER and self._acks > len(self._entries):
+                self._compact()
+
+    def expired(self, entry_id: int) -> bool:
+        rec = self._entries.get(entry_id)
+        return rec is not None and time.time() - rec["t"] > _OUTBOX_MAX_AGE
+
+    def pending_count(self) -> int:
+        return len(self._entries)
+
+    def _write(self, rec: dict, sync: bool = False):
+        if self._path is None:
+            return   # not opened (yet): in-memory only
+        try:
+            if self._file is None:
+                self._file = open(self._path, "a", encoding="utf-8")
+            self._file.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            print("[OpenGL Notifier] Outbox write failed:", e)
+
+    def _compact(self):
+        """Rewrite the file with only the pending entries."""
+        self._acks = 0
+        if self._path is None:
+            return
+        tmp = self._path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry_id in sorted(self._entries):
+                    f.write(json.dumps(self._entries[entry_id], ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(tmp, self._path)
+        except OSError as e:
+            print("[OpenGL Notifier] Outbox compaction failed:", e)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._claim is not None:
+                self._claim.close()
+                self._claim = None
+            self._path = None
+
+def _try_lock(path: str):
+    """Open `path` and take an exclusive, non-blocking lock on it. None if another process holds it."""
+    try:
+        f = open(path, "a+b")
+    except OSError as e:
+        print("[OpenGL Notifier] Could not open lock file:", e)
+        return None
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return f
+    except OSError:
+        f.close()
+        return None
+
+_OUTBOX = _Outbox()
+
+# ---------------------------
+# Notification sinks (each job event is built once and fanned out)
+# ---------------------------
+# Events: "start", "progress", "encoding", "done", "canceled". A sink snapshots
+# its settings from the preferences on the main thread when a job is armed
+# (from_prefs returns None when it is switched off) and receives every event
+# of that job as the same plain dict.
+def _job_event(job, stage: str, stats: dict, text: str = None) -> dict:
+    return {"event": stage, "job_id": job.id, "job": job.label, "time": time.time(),
+            "stats": stats, "text": text}
+
+class _Sink:
+    """A notification destination. deliver() runs on a fan-out thread unless `inline`.
+
+    A sink's constructor arguments are also its attributes, so spec() can
+    store it in the outbox and from_spec() rebuild it in a later session.
+    Events for `durable` sinks go through the outbox.
+    """
+    name    = "sink"
+    events  = frozenset({"start", "progress", "encoding", "at_risk", "done", "canceled"})
+    inline  = False   # deliver(event, ack) is cheap and non-blocking, and calls ack() once sent
+    durable = True
+    timeout = 10.0
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return None
 
+    @classmethod
+    def from_spec(cls, spec: dict):
+        return cls(**spec)
+
+    def spec(self) -> dict:
+        return dict(vars(self))
+
+    @property
+    def key(self) -> str:
+        """Identity of the destination (same settings → same ordered queue)."""
+        return self.name + ":" + json.dumps(self.spec(), sort_keys=True)
+
+    def wants(self, event: dict) -> bool:
+        return event["event"] in self.events
+
+    def deliver(self, event: dict):
+        raise NotImplementedError
+
+class _DiscordSink(_Sink):
+    """The live Discord card; hands off to _DELIVERY, which owns rate limits and card state."""
+    name   = "Discord"
+    inline = True
+
+    def __init__(self, target):
+        self.target = target
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return cls(pf.discord_target) if pf.discord_target else None
+
+    def deliver(self, event, ack=None):
+        stage, job_id = event["event"], event["job_id"]
+        if event.get("card"):
+            _DELIVERY.message_ids.setdefault(job_id, event["card"])   # replayed: an earlier session's card
+        embed = _discord_build_embed(stage, event["stats"])
+        if stage == "start":
+            _DELIVERY.submit("create", self.target, job_id, embed, ack)
+        elif stage in ("progress", "encoding"):
+            _DELIVERY.submit_progress(self.target, job_id, embed, ack)
+        elif event["text"]:
+            # Final card, then a plain text message for a fresh mobile notification;
+            # the event counts as delivered once both are out
+            both = _AckAfter(2, ack)
+            _DELIVERY.submit("update", self.target, job_id, embed, both, final=(stage != "at_risk"))
+            _DELIVERY.submit("text", self.target, body=event["text"], ack=both)
+        else:
+            _DELIVERY.submit("update", self.target, job_id, embed, ack, final=(stage != "at_risk"))
+
+class _AckAfter:
+    """Ack callback that fires the wrapped one after being called `n` times."""
+
+    def __init__(self, n, ack):
+        self._left, self._ack, self._lock = n, ack, threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self._left -= 1
+            fire = self._left == 0
+        if fire:
+            _call_ack(self._ack)
+
+def _post_json(url: str, payload: dict, timeout: float, what: str):
+    status, _, body = _HTTP_POOL.request("POST", url, json.dumps(payload).encode("utf-8"),
+                                         {"Content-Type": "application/json"}, timeout=timeout)
+    if status >= 400:
+        raise OSError(f"{what} HTTP {status}: {body[:200].decode('utf-8', errors='ignore')}")
+
+class _WebhookSink(_Sink):
+    """Generic JSON webhook: every event is POSTed as-is."""
+    name = "Webhook"
+
+    def __init__(self, url, timeout):
+        self.url, self.timeout = url, timeout
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return cls(pf.json_webhook, pf.sink_timeout) if pf.json_webhook else None
+
+    def deliver(self, event):
+        _post_json(self.url, event, self.timeout, "webhook")
+
+class _SlackSink(_Sink):
+    """Slack-compatible incoming webhook. Messages can't be edited there, so only milestones are sent."""
+    name   = "Slack"
+    events = frozenset({"start", "at_risk", "done", "canceled"})
+
+    def __init__(self, url, timeout):
+        self.url, self.timeout = url, timeout
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return cls(pf.slack_webhook, pf.sink_timeout) if pf.slack_webhook else None
+
+    def deliver(self, event):
+        stats = event["stats"]
+        text = event["text"] or (f"▶️ Viewport render started — {event['job']} "
+                                 f"({stats.get('total_frames', 0)} frames)")
+        _post_json(self.url, {"text": text}, self.timeout, "Slack")
+
+class _JsonlSink(_Sink):
+    """Appends every event as one JSON line to a local file."""
+    name  = "JSONL"
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return cls(pf.event_log) if pf.event_log else None
+
+    def deliver(self, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+class _DesktopSink(_Sink):
+    """Sound and desktop popup when a job finishes, or its output disk is about to fill up."""
+    name    = "Desktop"
+    events  = frozenset({"at_risk", "done", "canceled"})
+    durable = False   # a beep after a restart would only confuse
+
+    def __init__(self, sound, custom_sound, toast):
+        self.sound, self.custom_sound, self.toast = sound, custom_sound, toast
+
+    @classmethod
+    def from_prefs(cls, pf):
+        if not (pf.enable_sound or pf.enable_toast):
+            return None
+        custom = pf.custom_sound_path if pf.enable_custom_sound else ""
+        return cls(pf.enable_sound, custom, pf.enable_toast)
+
+    def deliver(self, event):
+        stage = event["event"]
+        if self.sound:
+            if self.custom_sound:
+                _DESKTOP.sound(self.custom_sound)
+            else:
+                _DESKTOP.beep()
+        if self.toast:
+            _DESKTOP.toast({"done": "Viewport render complete",
+                            "at_risk": "Render output disk may fill up"}.get(stage, "Viewport render canceled"))
+
+class _HubSink(_Sink):
+    """Reports events to an aggregation hub over UDP (see _Hub); the hub owns the Discord card."""
+    name    = "Hub"
+    durable = False   # the hub's dashboard is rebuilt from the next report anyway
+
+    def __init__(self, address):
+        self.address = address
+
+    @classmethod
+    def from_prefs(cls, pf):
+        return cls(pf.hub) if pf.hub else None
+
+    def deliver(self, event):
+        host, _, port = self.address.rpartition(":")
+        data = json.dumps({"v": 1, "src": _SOURCE, "event": event}).encode("utf-8")
+        _hub_socket().sendto(data, (host or "127.0.0.1", int(port)))
+
+# Every sink type; a job gets one instance of each that is switched on.
+_SINK_TYPES = (_DiscordSink, _WebhookSink, _SlackSink, _JsonlSink, _DesktopSink, _HubSink)
+
+def _build_sinks(pf):
+    """The enabled sinks for a new job, from a _Config."""
+    sinks = []
+    for cls in _SINK_TYPES:
+        try:
+            sink = cls.from_prefs(pf)
+        except Exception as e:
+            print(f"[OpenGL Notifier] {cls.name} sink setup failed:", e)
+            continue
+        if sink is not None:
+            sinks.append(sink)
+    return sinks
+
+class _Fanout:
+    """Delivers events to sinks concurrently on a small thread pool.
+
+    Each sink has its own FIFO so its events stay in order, while different
+    sinks run side by side: a slow or hanging destination only holds up
+    itself. A progress event still waiting behind a slow delivery is replaced
+    by the next one for the same job. Failures are counted per sink; events
+    for durable sinks are retried with backoff until delivered (or too old)
+    and stay in the outbox meanwhile.
+    """
+
+    WORKERS = 8
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._pool     = None
+        self._queues   = {}   # sink key -> list of waiting [event, outbox id]
+        self._sinks    = {}   # sink key -> sink
+        self._running  = set()
+        self._attempts = {}   # sink key -> failed deliveries in a row
+        self.counters  = {}   # sink name -> {"sent": n, "failed": n}
+
+    def publish(self, sinks, event: dict):
+        for sink in sinks:
+            if sink.wants(event):
+                entry = _OUTBOX.add(sink, event) if sink.durable else None
+                self.send(sink, event, entry)
+
+    def send(self, sink, event: dict, entry=None):
+        """Queue one event for one sink; `entry` is its outbox id, if any."""
+        if sink.inline:
+            self._deliver(sink, event, functools.partial(_OUTBOX.ack, entry) if entry else None)
+            return
+        key = sink.key
+        with self._lock:
+            self._sinks[key] = sink
+            waiting = self._queues.setdefault(key, [])
+            last = waiting[-1] if len(waiting) > 1 else None   # never the head: it may be in flight
+            if (last is not None and last[0]["event"] == event["event"] == "progress"
+                    and last[0]["job_id"] == event["job_id"]):
+                stale, waiting[-1] = last[1], [event, entry]
+            else:
+                stale = None
+                waiting.append([event, entry])
+            start = key not in self._running
+            if start:
+                self._running.add(key)
+        if stale is not None:
+            _OUTBOX.ack(stale)
+        if start:
+            self._submit(key)
+
+    def _submit(self, key):
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    self.WORKERS, thread_name_prefix="OpenGLNotifier-sink")
+            pool = self._pool
+        pool.submit(self._drain, key)
+
+    def _drain(self, key):
+        while True:
+            with self._lock:
+                waiting = self._queues.get(key)
+                if not waiting:
+                    self._queues.pop(key, None)
+                    self._running.discard(key)
+                    return
+                event, entry = waiting[0]
+                sink = self._sinks[key]
+            if not self._deliver(sink, event, None) and sink.durable and not _OUTBOX.expired(entry):
+                # Keep it at the head (order matters) and come back after a backoff
+                attempt = self._attempts.get(key, 0)
+                self._attempts[key] = attempt + 1
+                timer = threading.Timer(_backoff(attempt), self._submit, (key,))
+                timer.daemon = True
+                timer.start()
+                return
+            self._attempts.pop(key, None)
+            with self._lock:
+                waiting.pop(0)
+            if entry is not None:
+                _OUTBOX.ack(entry)
+
+    def _deliver(self, sink, event, ack) -> bool:
+        c = self.counters.setdefault(sink.name, {"sent": 0, "failed": 0})
+        try:
+            if sink.inline:
+                sink.deliver(event, ack)
+            else:
+                sink.deliver(event)
+            c["sent"] += 1
+            return True
+        except Exception as e:
+            c["failed"] += 1
+            print(f"[OpenGL Notifier] {sink.name} delivery failed ({event['event']}):", e)
+            return False
+
+    def stop(self, timeout: float = 2.0):
+        """Give queued deliveries up to `timeout`, then drop the pool (the outbox keeps the rest)."""
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._queues.clear()
+            self._running.clear()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+_FANOUT = _Fanout()
+
+def _publish(job, stage: str, stats: dict, text: str = None):
+    """Build one event for a job and send it to all of its sinks."""
+    if job.sinks:
+        _FANOUT.publish(job.sinks, _job_event(job, stage, stats, text))
+
+def _record_card(job, stats: dict):
+    """Keep the job's new Discord card in the outbox, with the event that closes it
+    (as canceled) should this session end before the job does."""
+    for sink in job.sinks:
+        if isinstance(sink, _DiscordSink):
+            _OUTBOX.add(sink, _job_event(job, "canceled", stats), card=job.discord_message_id)
+
+def _replay_outbox(folder: str):
+    """Open the outbox in `folder` and send what an earlier session left undelivered."""
     try:
-        req = urllib.request.Request(url, data=data, headers=headers, method="PATCH")
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            code = resp.getcode()
-            print(f"[OpenGL Notifier] Discord embed edited HTTP {code}")
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="ignore")
-        print(f"[OpenGL Notifier] Discord HTTPError (embed PATCH) {e.code}: {body}")
-    except urllib.error.URLError as e:
-        print(f"[OpenGL Notifier] Discord URLError (embed PATCH): {e.reason}")
+        os.makedirs(folder, exist_ok=True)
+        left = _OUTBOX.open(folder)
     except Exception as e:
-        print("[OpenGL Notifier] Discord unexpected error (embed PATCH):", e)
+        print("[OpenGL Notifier] Outbox unavailable, events are kept in memory only:", e)
+        return
+    types = {cls.name: cls for cls in _SINK_TYPES}
+    # Those jobs died with their session: only a job's last event per sink is
+    # worth sending, and if it was not final the job is reported as canceled,
+    # so no card is left "Rendering…" forever.
+    # A card the session created is edited rather than posted again.
+    last, cards = {}, {}
+    for rec in left:
+        key = (rec["sink_key"], rec["session"], rec["event"]["job_id"])
+        if "card" in rec:
+            cards[key] = rec   # acked along with the final event
+            continue
+        if key in last:
+            _OUTBOX.ack(last[key]["add"])
+        last[key] = rec
+    for key, card in cards.items():
+        last.setdefault(key, card)
+    for key, rec in last.items():
+        card  = cards.get(key)
+        entry = rec["add"]
+        event = rec["event"]
+        if event["event"] not in _Outbox.FINAL:
+            if card is not None:
+                _OUTBOX.ack(entry)
+                entry = card["add"]
+            event = dict(event, event="canceled")
+        cls = types.get(rec["sink_type"])
+        if cls is None or time.time() - rec["t"] > _OUTBOX_MAX_AGE:
+            _OUTBOX.ack(entry)
+            continue
+        try:
+            sink = cls.from_spec(rec["sink"])
+        except Exception as e:
+            print(f"[OpenGL Notifier] Dropping outbox entry {entry}:", e)
+            _OUTBOX.ack(entry)
+            continue
+        # Job ids restart every session; keep old jobs' cards apart from new ones
+        event = dict(event, job_id=f"{rec['session']}:{event['job_id']}")
+        if card is not None:
+            event["card"] = card["card"]
+        _FANOUT.send(sink, event, entry)
+    if last:
+        print(f"[OpenGL Notifier] Replaying {len(last)} undelivered notification(s) from the outbox.")
 
 # ---------------------------
 # Core watcher
@@ -411,113 +1755,1469 @@ def _human_secs(s: float) -> str:
     if m:   return f"{m:d}m {sec:02d}s"
     return f"{sec:d}s"
 
-def _expected_paths(scene, r, animation: bool):
-    frames = range(scene.frame_start, scene.frame_end + 1) if animation else [scene.frame_current]
-    return [Path(bpy.path.abspath(r.frame_path(frame=f))) for f in frames]
+class _FrameSet:
+    """The frames a job expects: a frame range + step and an output filename template.
+
+    A frame's path, or a filename's frame index, is derived on demand, so
+    arming and memory cost the same for 10 frames or 100k. If Blender's output
+    path cannot be expressed as folder/prefix + padded number + suffix, the
+    set falls back to an explicit list of paths.
+    """
+    __slots__ = ("start", "step", "count", "folder", "prefix", "suffix", "pad", "paths")
+
+    def __init__(self, start, step, count, folder="", prefix="", suffix="", pad=4, paths=None):
+        self.start  = start
+        self.step   = step
+        self.count  = count
+        self.folder = folder
+        self.prefix = prefix
+        self.suffix = suffix
+        self.pad    = pad
+        self.paths  = paths   # only set in the fallback case
+
+    @classmethod
+    def from_scene(cls, scene, r, animation: bool):
+        if animation:
+            start, step = scene.frame_start, max(scene.frame_step, 1)
+            count = len(range(start, scene.frame_end + 1, step))
+        else:
+            start, step, count = scene.frame_current, 1, 1
+        return cls.from_resolver(start, step, count, lambda f: bpy.path.abspath(r.frame_path(frame=f)))
+
+    @classmethod
+    def from_template(cls, template: str, start: int, end: int, step: int = 1):
+        """Frames from a Blender-style path: the last run of # is the zero-padded frame number."""
+        runs = list(re.finditer(r"#+", template))
+        if runs:
+            head, pad, tail = template[:runs[-1].start()], len(runs[-1].group()), template[runs[-1].end():]
+        else:
+            head, pad, tail = template, 4, ""   # like Blender: frame number appended
+        count = len(range(start, end + 1, step))
+        return cls.from_resolver(start, step, count,
+                                 lambda f: os.path.abspath(f"{head}{str(f).zfill(pad)}{tail}"))
+
+    @classmethod
+    def from_resolver(cls, start: int, step: int, count: int, resolve):
+        """Frames from a frame number → path function, as a template when its paths allow it."""
+        PROBE = "987654"   # a frame number that will not occur in a real path
+        probe = resolve(int(PROBE))
+        at = probe.rfind(PROBE)
+        if at >= 0 and count:
+            head, suffix = probe[:at], probe[at + len(PROBE):]
+            zero = resolve(0)
+            digits = zero[len(head):len(zero) - len(suffix)] if zero.endswith(suffix) else ""
+            folder, prefix = os.path.split(head)
+            fs = cls(start, step, count, folder, prefix, suffix, len(digits))
+            last = start + (count - 1) * step
+            if (zero.startswith(head) and digits and set(digits) == {"0"} and os.sep not in suffix
+                    and fs.path(0) == resolve(start) and fs.path(count - 1) == resolve(last)):
+                return fs
+
+        frames = range(start, start + count * step, step)
+        return cls(start, step, count, paths=[resolve(f) for f in frames])
+
+    def __len__(self):
+        return self.count
+
+    def frame(self, i: int) -> int:
+        return self.start + i * self.step
+
+    def path(self, i: int) -> str:
+        if self.paths is not None:
+            return self.paths[i]
+        f = self.frame(i)
+        digits = str(abs(f)).zfill(self.pad)
+        return os.path.join(self.folder, f"{self.prefix}{'-' if f < 0 else ''}{digits}{self.suffix}")
+
+    def folders(self):
+        if self.paths is not None:
+            return sorted({os.path.dirname(p) for p in self.paths})
+        return [self.folder]
+
+    def index_of(self, name: str):
+        """Frame index for a filename in the output folder, or None if it is not one of ours."""
+        prefix, suffix = self.prefix, self.suffix
+        if not (name.startswith(prefix) and name.endswith(suffix)) or len(name) <= len(prefix) + len(suffix):
+            return None
+        digits = name[len(prefix):len(name) - len(suffix)]
+        body = digits[1:] if digits.startswith("-") else digits
+        if not body.isdigit() or len(body) < self.pad or (len(body) > self.pad and body[0] == "0"):
+            return None
+        off = int(digits) - self.start
+        if off % self.step:
+            return None
+        i = off // self.step
+        return i if 0 <= i < self.count else None
 
-def _count_completed(paths, start_time):
-    """Count frames that exist, are non-empty, and were written in this run."""
-    n = 0
-    for p in paths:
-        try:
-            if p.exists():
-                st = p.stat()
-                if st.st_size > 0 and st.st_mtime >= start_time:
-                    n += 1
-        except Exception:
-            pass
-    return n
-
-# State kept at module level for the timer
-_STATE = {
-    "armed": False,
-    "animation": True,
-    "expected": [],
-    "expected_count": 0,
-    "first_frame": 0,
-    "last_frame": 0,
-    "last_path": None,
-    "last_size_time": (None, 0.0),
-    "start_time": 0.0,
-    "started_posted": False,
-    "last_progress_post": 0.0,
-    "prev_exist_count": 0,
-    "frame_times": [],
-    "last_frame_t0": None,
-    "discord_message_id": None,
-    "job_label": "",
+# ---------------------------
+# Frame file validation: is a frame completely written?
+# ---------------------------
+# Each validator gets an open binary file and its size, reads only a header
+# and/or tail, and returns True (complete), False (not yet) or None (cannot tell).
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_IEND      = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+_EXR_MAGIC     = b"\x76\x2f\x31\x01"
+_EXR_LINES_PER_CHUNK = {0: 1, 1: 1, 2: 1, 3: 16, 4: 32, 5: 16, 6: 32, 7: 32, 8: 32, 9: 256}
+_EXR_HEADER_MAX = 65536
+
+def _png_complete(f, size):
+    if size < len(_PNG_SIGNATURE) + len(_PNG_IEND) or f.read(8) != _PNG_SIGNATURE:
+        return False
+    f.seek(size - len(_PNG_IEND))
+    return f.read(len(_PNG_IEND)) == _PNG_IEND
+
+def _jpeg_complete(f, size):
+    if size < 4 or f.read(2) != b"\xff\xd8":
+        return False
+    f.seek(size - 2)
+    return f.read(2) == b"\xff\xd9"
+
+def _bmp_complete(f, size):
+    head = f.read(6)
+    if len(head) < 6 or head[:2] != b"BM":
+        return False
+    return size >= struct.unpack_from("<I", head, 2)[0]
+
+def _exr_complete(f, size):
+    """Scanline OpenEXR: header, then a filled-in chunk offset table and a complete last chunk."""
+    head = f.read(min(size, _EXR_HEADER_MAX))
+    if len(head) < 8 or head[:4] != _EXR_MAGIC:
+        return False
+    if struct.unpack_from("<I", head, 4)[0] & 0x1A00:
+        return None   # tiled, deep or multi-part: not handled here
+
+    compression = data_window = None
+    pos = 8
+    try:
+        while True:
+            end  = head.index(b"\0", pos)
+            name = head[pos:end]
+            pos  = end + 1
+            if not name:
+                break
+            pos = head.index(b"\0", pos) + 1          # attribute type
+            (n,) = struct.unpack_from("<i", head, pos)
+            value = head[pos + 4:pos + 4 + n]
+            if len(value) < n:
+                raise ValueError
+            pos += 4 + n
+            if name == b"compression":
+                compression = value[0]
+            elif name == b"dataWindow":
+                data_window = struct.unpack("<iiii", value)
+    except (ValueError, struct.error):
+        # Header cut short: still being written, unless we only read part of it
+        return False if size <= _EXR_HEADER_MAX else None
+
+    lines = _EXR_LINES_PER_CHUNK.get(compression)
+    if lines is None or data_window is None:
+        return None
+    chunks = -(-(data_window[3] - data_window[1] + 1) // lines)
+    if size < pos + 8 * chunks:
+        return False
+
+    f.seek(pos)
+    offsets = struct.unpack(f"<{chunks}Q", f.read(8 * chunks))
+    if not offsets or min(offsets) == 0:
+        return False   # the table is written as zeros first and filled in at the end
+    last = max(offsets)
+    if last + 8 > size:
+        return False
+    f.seek(last)
+    _y, n = struct.unpack("<ii", f.read(8))
+    return last + 8 + n <= size
+
+_FRAME_VALIDATORS = {
+    ".png": _png_complete,
+    ".jpg": _jpeg_complete,
+    ".jpeg": _jpeg_complete,
+    ".bmp": _bmp_complete,
+    ".exr": _exr_complete,
 }
 
-def _watcher_timer():
-    pf = _prefs()
-    now = time.time()
+def _has_validator(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in _FRAME_VALIDATORS
+
+def _frame_complete(path: str, size: int):
+    """True/False if the frame file is (not) completely written; None for formats we cannot check."""
+    check = _FRAME_VALIDATORS.get(os.path.splitext(path)[1].lower())
+    if check is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return check(f, size)
+    except (OSError, struct.error):
+        return False
+
+class _CompletionIndex:
+    """Bitmap of finished frame indices plus a cursor to the lowest pending one.
+
+    Finished frames are never looked at again, so a scan only costs as much
+    as the frames that are still outstanding. The file size seen when a frame
+    was marked is kept per index (0 = unknown).
+    """
+    __slots__ = ("bits", "size", "count", "cursor", "fresh", "sizes", "bytes")
+
+    def __init__(self, size: int):
+        self.bits   = bytearray((size + 7) // 8)
+        self.size   = size
+        self.count  = 0
+        self.cursor = 0
+        self.fresh  = []   # (completion time, index) of frames finished since take_fresh()
+        self.sizes  = array.array("q", bytes(8 * size))
+        self.bytes  = 0    # total size of the finished frames
+
+    def is_done(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def mark(self, i: int, t: float, file_size: int = 0) -> bool:
+        """Mark frame index i finished at time t. Returns True if it was still pending."""
+        if self.is_done(i):
+            return False
+        self.bits[i >> 3] |= 1 << (i & 7)
+        self.sizes[i] = file_size
+        self.bytes   += file_size
+        self.count += 1
+        self.fresh.append((t, i))
+        if i == self.cursor:
+            self._advance()
+        return True
+
+    def _advance(self):
+        bits, i, n = self.bits, self.cursor, self.size
+        while i < n:
+            if bits[i >> 3] == 0xFF:
+                i = (i | 7) + 1  # whole byte finished, skip it
+            elif bits[i >> 3] & (1 << (i & 7)):
+                i += 1
+            else:
+                break
+        self.cursor = min(i, n)
+
+    def pending(self):
+        """Yield the indices of frames that are not finished yet, lowest first."""
+        bits = self.bits
+        i, n = self.cursor, self.size
+        while i < n:
+            b = bits[i >> 3]
+            if b == 0xFF:
+                i = (i | 7) + 1
+                continue
+            if not b & (1 << (i & 7)):
+                yield i
+            i += 1
+
+    def take_fresh(self):
+        """Return (oldest first) and forget the (time, index) pairs recorded since the last call."""
+        fresh, self.fresh = self.fresh, []
+        fresh.sort()
+        return fresh
+
+    @property
+    def complete(self) -> bool:
+        return self.count >= self.size
+
+
+def _poll_completed(index: _CompletionIndex, frames: _FrameSet, start_time, now) -> int:
+    """Stat pending frames only; mark the ones that exist, are non-empty and were
+    written in this run. Returns how many frames finished on this pass."""
+    newly = 0
+    for i in index.pending():
+        path = frames.path(i)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if st.st_size > 0 and st.st_mtime >= start_time and _frame_complete(path, st.st_size) is not False:
+            index.mark(i, now, st.st_size)
+            newly += 1
+    return newly
+
+class _DirScanner:
+    """Single-pass frame detection: one os.scandir() per output folder per tick.
+
+    Directory entries are matched to frame indices through the frame set's
+    filename template (or, for the fallback path list, a filename -> index map
+    per folder), so a listing of a network share replaces one stat() round
+    trip per frame. Folders with nothing left to find are no longer listed.
+    """
+    __slots__ = ("frames", "dirs", "cache")
+
+    def __init__(self, frames: _FrameSet):
+        self.frames = frames
+        self.dirs   = None   # folder -> {filename: frame index}, fallback path lists only
+        self.cache  = {}     # frame index -> (mtime, size) of files seen but not finished yet
+        if frames.paths is not None:
+            self.dirs = {}
+            for i, p in enumerate(frames.paths):
+                folder, name = os.path.split(p)
+                self.dirs.setdefault(folder, {})[name] = i
+
+    def _lookup(self, folder: str, name: str):
+        if self.dirs is None:
+            return self.frames.index_of(name) if folder == self.frames.folder else None
+        names = self.dirs.get(folder)
+        return names.get(name) if names else None
+
+    def _folders(self, index: _CompletionIndex):
+        if self.dirs is not None:
+            return list(self.dirs)
+        return [] if index.complete else [self.frames.folder]
+
+    def scan(self, index: _CompletionIndex, start_time, now) -> int:
+        """List each folder once and mark newly finished frames. Returns how many."""
+        newly = 0
+        for folder in self._folders(index):
+            try:
+                it = os.scandir(folder)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    i = self._lookup(folder, entry.name)
+                    if i is None or index.is_done(i):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    newly += self._accept(index, i, folder, entry.name, st, start_time, now)
+        return newly
+
+    def check(self, index: _CompletionIndex, folder: str, name: str, start_time, t) -> bool:
+        """Verify a single file reported by a file-system event and mark it finished."""
+        i = self._lookup(folder, name)
+        if i is None or index.is_done(i):
+            return False
+        try:
+            st = os.stat(os.path.join(folder, name))
+        except OSError:
+            return False
+        return self._accept(index, i, folder, name, st, start_time, t)
+
+    def recheck(self, index: _CompletionIndex, start_time, now) -> int:
+        """Look again at files that were seen but not finished (event mode gets no second event)."""
+        newly = 0
+        for i in list(self.cache):
+            if index.is_done(i):
+                self.cache.pop(i, None)
+                continue
+            folder, name = os.path.split(self.frames.path(i))
+            try:
+                st = os.stat(os.path.join(folder, name))
+            except OSError:
+                continue
+            if (st.st_mtime, st.st_size) != self.cache[i] or _has_validator(name):
+                newly += self._accept(index, i, folder, name, st, start_time, now)
+        return newly
+
+    def _accept(self, index, i, folder, name, st, start_time, t) -> bool:
+        if (st.st_size <= 0 or st.st_mtime < start_time
+                or _frame_complete(os.path.join(folder, name), st.st_size) is False):
+            self.cache[i] = (st.st_mtime, st.st_size)
+            return False
+        index.mark(i, t, st.st_size)
+        self.cache.pop(i, None)
+        if self.dirs is not None:
+            names = self.dirs[folder]
+            del names[name]
+            if not names:
+                del self.dirs[folder]
+        return True
+
+class _InotifyWatcher:
+    """Linux inotify on the output folders (ctypes, no extra dependencies).
+
+    A reader thread turns IN_CLOSE_WRITE / IN_MOVED_TO events into
+    (folder, filename, time) tuples on a queue, so the timer only drains it
+    and frame times come from when the file was actually closed. `failed`
+    flips to True if the kernel drops events or removes a watch; the timer
+    then goes back to polling.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO    = 0x00000080
+    IN_Q_OVERFLOW  = 0x00004000
+    IN_IGNORED     = 0x00008000
+    IN_NONBLOCK    = 0o4000
+    IN_CLOEXEC     = 0o2000000
+    _EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(self, folders):
+        import ctypes, ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_init1: " + os.strerror(err))
+
+        self.fd      = fd
+        self.wds     = {}
+        self.events  = queue.SimpleQueue()
+        self.failed  = False
+        self._closed = threading.Event()
+
+        for folder in folders:
+            wd = libc.inotify_add_watch(fd, os.fsencode(folder), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+            if wd < 0:
+                # ENOSPC here means max_user_watches was hit; ENOENT that the folder is missing
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, f"inotify_add_watch {folder}: " + os.strerror(err))
+            self.wds[wd] = folder
+
+        self._thread = threading.Thread(target=self._run, name="OpenGLNotifier-inotify", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        buf = b""
+        try:
+            while not self._closed.is_set():
+                ready, _, _ = select.select([self.fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    buf += os.read(self.fd, 65536)
+                except BlockingIOError:
+                    continue
+                now = time.time()
+                off, size = 0, self._EVENT.size
+                while off + size <= len(buf):
+                    wd, mask, _cookie, length = self._EVENT.unpack_from(buf, off)
+                    if off + size + length > len(buf):
+                        break
+                    name = buf[off + size:off + size + length].rstrip(b"\0")
+                    off += size + length
+                    if mask & (self.IN_Q_OVERFLOW | self.IN_IGNORED):
+                        self.failed = True
+                    elif name and wd in self.wds:
+                        self.events.put((self.wds[wd], os.fsdecode(name), now))
+                buf = buf[off:]
+        except Exception as e:
+            print("[OpenGL Notifier] inotify reader stopped:", e)
+            self.failed = True
+        finally:
+            os.close(self.fd)
+
+    def drain(self):
+        """Yield all (folder, filename, time) events queued so far."""
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
 
-    CANCEL_IDLE_MIN    = 120.0   # at least 2 minutes idle
-    CANCEL_IDLE_FACTOR = 5.0    # or 5x the average frame time, whichever is larger
+    def close(self):
+        self._closed.set()
 
-    if not _STATE["armed"]:
-        return None  # shouldn't happen
 
-    expected       = _STATE["expected"]
-    expected_count = _STATE["expected_count"]
-    last_path      = _STATE["last_path"]
-    start_time     = _STATE["start_time"]
-    last_size, last_t = _STATE["last_size_time"]
-    started_posted = _STATE["started_posted"]
+def _start_inotify(folders):
+    """Return an _InotifyWatcher on `folders`, or None to keep polling."""
+    if platform.system() != "Linux":
+        return None
+    try:
+        for folder in folders:
+            # Blender creates the output folder on the first write anyway; it
+            # has to exist now so it can be watched.
+            os.makedirs(folder, exist_ok=True)
+        return _InotifyWatcher(folders)
+    except Exception as e:
+        print(f"[OpenGL Notifier] File events unavailable, polling instead: {e}")
+        return None
+
+class _FrameStats:
+    """Streaming per-frame timing statistics, constant time and memory per frame.
+
+    Keeps a running count/sum/min/max, an exponentially weighted moving
+    average, and a ring buffer of the last WINDOW frame times for a
+    recent-window mean.
+    """
+    __slots__ = ("count", "total", "min", "max", "last", "ewma", "ring", "ring_sum", "pos")
+    WINDOW = 32
+    ALPHA  = 0.2   # EWMA weight of the newest frame
+
+    def __init__(self):
+        self.count    = 0
+        self.total    = 0.0
+        self.min      = None
+        self.max      = None
+        self.last     = None
+        self.ewma     = None
+        self.ring     = array.array("d", bytes(8 * self.WINDOW))
+        self.ring_sum = 0.0
+        self.pos      = 0
+
+    def add(self, dt: float):
+        self.count += 1
+        self.total += dt
+        self.last   = dt
+        self.min    = dt if self.min is None else min(self.min, dt)
+        self.max    = dt if self.max is None else max(self.max, dt)
+        self.ewma   = dt if self.ewma is None else self.ewma + self.ALPHA * (dt - self.ewma)
+
+        self.ring_sum += dt - self.ring[self.pos]
+        self.ring[self.pos] = dt
+        self.pos = (self.pos + 1) % self.WINDOW
+        if self.pos == 0:
+            self.ring_sum = sum(self.ring)  # re-sum once per lap so float error cannot build up
+
+    def __bool__(self):
+        return self.count > 0
+
+    def mean(self):
+        return (self.total / self.count) if self.count else None
+
+    def recent_mean(self):
+        n = min(self.count, self.WINDOW)
+        return (self.ring_sum / n) if n else None
+
+    def estimate(self, mode: str):
+        """Per-frame time used for the ETA: 'MEAN', 'RECENT' or 'EWMA'."""
+        if mode == 'RECENT':
+            return self.recent_mean()
+        if mode == 'EWMA':
+            return self.ewma
+        return self.mean()
+
+_SLOWEST_FRAMES = 5   # slowest frame numbers listed on the done card
+
+def _percentile(ordered, q: float):
+    """Nearest-rank percentile (0-100) of an already sorted, non-empty sequence."""
+    return ordered[min(int(q / 100.0 * len(ordered)), len(ordered) - 1)]
+
+class _FrameProfile:
+    """Per-frame record of a job in completion order, as packed array columns.
+
+    Frame index, completion time and seconds since the previous frame (NaN
+    when unknown, e.g. the first one); file sizes stay in the completion
+    index. 16 bytes per frame, so 100k frames cost about 1.6 MB. The slowest
+    frames are kept in a small heap as they come in.
+    """
+    __slots__ = ("index", "done_at", "delta", "slow")
+
+    def __init__(self):
+        self.index   = array.array("i")
+        self.done_at = array.array("d")
+        self.delta   = array.array("f")
+        self.slow    = []   # min-heap of (seconds, frame index), at most _SLOWEST_FRAMES long
+
+    def add(self, i: int, t: float, dt):
+        self.index.append(i)
+        self.done_at.append(t)
+        if dt is None:
+            self.delta.append(float("nan"))
+            return
+        self.delta.append(dt)
+        if len(self.slow) < _SLOWEST_FRAMES:
+            heapq.heappush(self.slow, (dt, i))
+        elif dt > self.slow[0][0]:
+            heapq.heapreplace(self.slow, (dt, i))
+
+    def __len__(self):
+        return len(self.index)
+
+    def summary(self, frames: _FrameSet) -> dict:
+        """p50/p95/max frame time and the slowest frame numbers (None/[] without timed frames)."""
+        timed = sorted(d for d in self.delta if d == d)
+        if not timed:
+            return {"p50": None, "p95": None, "max": None, "slowest": []}
+        return {"p50": _percentile(timed, 50), "p95": _percentile(timed, 95), "max": timed[-1],
+                "slowest": [(frames.frame(i), dt) for dt, i in sorted(self.slow, reverse=True)]}
+
+    def rows(self, frames: _FrameSet, sizes):
+        """(frame number, completion time, seconds or None, bytes) per frame, generated lazily."""
+        for k in range(len(self.index)):
+            i, dt = self.index[k], self.delta[k]
+            yield frames.frame(i), self.done_at[k], (dt if dt == dt else None), sizes[i]
+
+def _export_profile(profile: _FrameProfile, frames: _FrameSet, sizes, base: str, fmt: str):
+    """Write a finished job's frame profile to base + ".csv" and/or ".json" (streamed, row by row)."""
+    written = []
+    try:
+        if fmt in ('CSV', 'BOTH'):
+            import csv
+            written.append(base + ".csv")
+            with open(base + ".csv", "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(("frame", "completed_at", "seconds", "bytes"))
+                for frame, t, dt, size in profile.rows(frames, sizes):
+                    w.writerow((frame, f"{t:.3f}", "" if dt is None else f"{dt:.3f}", size))
+        if fmt in ('JSON', 'BOTH'):
+            written.append(base + ".json")
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                f.write('{"columns": ["frame", "completed_at", "seconds", "bytes"], "rows": [')
+                for n, (frame, t, dt, size) in enumerate(profile.rows(frames, sizes)):
+                    f.write(f'{"," if n else ""}\n[{frame}, {t:.3f}, {"null" if dt is None else f"{dt:.3f}"}, {size}]')
+                f.write("\n]}\n")
+        print("[OpenGL Notifier] Frame profile written:", ", ".join(written))
+    except Exception as e:
+        print("[OpenGL Notifier] Could not write the frame profile:", e)
+
+def _frame_secs(s) -> str:
+    """Frame time for the card: tenths of a second below a minute, else like _human_secs."""
+    if s is None:
+        return "—"
+    return f"{s:.1f}s" if s < 60 else _human_secs(s)
+
+# ---------------------------
+# Post-render encode (frames → MP4/GIF with local ffmpeg, in parallel segments)
+# ---------------------------
+class _ProcessSlots:
+    """Counting semaphore whose size can change: caps ffmpeg processes across all jobs."""
+
+    def __init__(self, limit: int):
+        self._cv    = threading.Condition()
+        self.limit  = limit
+        self.in_use = 0
+
+    def set_limit(self, limit: int):
+        with self._cv:
+            self.limit = max(int(limit), 1)
+            self._cv.notify_all()
+
+    def acquire(self, abort) -> bool:
+        """Wait for a free slot; gives up (False) once abort() is true."""
+        with self._cv:
+            while self.in_use >= self.limit:
+                if abort():
+                    return False
+                self._cv.wait(0.25)
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self._cv:
+            self.in_use -= 1
+            self._cv.notify()
+
+_ENCODE_SLOTS = _ProcessSlots(2)
+
+def _low_priority(cmd):
+    """Popen kwargs + command that run an encoder below normal priority, so a render keeps the CPU."""
+    if platform.system() == "Windows":
+        return cmd, {"creationflags": getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)}
+    nice = shutil.which("nice")
+    return ([nice, "-n", "10"] + cmd if nice else cmd), {}
+
+class _EncodeRun:
+    """Encodes a finished frame set into one MP4 or GIF.
+
+    The frames are split into segments, which a fixed set of worker threads
+    (one per _ENCODE_SLOTS slot) take from a queue and encode with separate
+    ffmpeg processes, then joined: MP4 segments are concatenated as-is, GIF
+    segments are lossless intermediates that get one palette pass at the end. Everything runs on background threads; the
+    scheduler only reads the progress counters.
+    """
+
+    def __init__(self, frames, fps: float, fmt: str, segment: int, output: str):
+        self.frames   = frames
+        self.fps      = fps
+        self.fmt      = fmt
+        self.output   = output
+        self.total    = len(frames)
+        n_seg         = max((self.total + segment - 1) // segment, 1)
+        step          = (self.total + n_seg - 1) // n_seg
+        self.segments = [(i, min(i + step, self.total)) for i in range(0, self.total, step)]
+        self.progress = [0] * len(self.segments)   # frames encoded per segment
+        self.stage    = "encoding"                 # -> "joining" -> "done" / "failed"
+        self.error    = None
+        self.started  = time.time()
+        self.finished = False
+        self._abort   = False
+        self._procs   = set()
+        self._lock    = threading.Lock()
+        self._tmp     = None
+
+    def start(self):
+        threading.Thread(target=self._run, name="OpenGLNotifier-encode", daemon=True).start()
+
+    def cancel(self):
+        self._abort = True
+        with self._lock:
+            procs = list(self._procs)
+        for p in procs:
+            try:
+                p.kill()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """Encode progress for the Discord card."""
+        done = sum(self.progress)
+        pct  = done / self.total * 100.0 if self.total else 100.0
+        took = time.time() - self.started
+        eta  = took / done * (self.total - done) if done else None
+        if self.stage == "joining":
+            text = f"Joining {len(self.segments)} segments…"
+        elif self.stage == "failed":
+            text = f"Failed: {self.error}"
+        elif self.stage == "done":
+            text = f"{os.path.basename(self.output)} ({_human_secs(took)})"
+        else:
+            text = (f"{done}/{self.total} ({pct:.1f}%) · {len(self.segments)} segments, "
+                    f"{_ENCODE_SLOTS.limit} workers")
+        return {"encode_format": self.fmt, "encode_str": text,
+                "eta_str": _human_secs(eta) if self.stage == "encoding" else "—"}
+
+    # --- background side ---
+    def _ffmpeg(self, args, seg=None) -> bool:
+        """Run one ffmpeg process; feeds its -progress output into self.progress[seg]."""
+        cmd, kw = _low_priority([self._exe, "-v", "error", "-y", "-nostats", "-progress", "pipe:1"] + args)
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kw)
+        with self._lock:
+            self._procs.add(p)
+        try:
+            for line in p.stdout:
+                if seg is not None and line.startswith(b"frame="):
+                    try:
+                        self.progress[seg] = int(line[6:])
+                    except ValueError:
+                        pass
+            err = p.stderr.read().decode("utf-8", errors="ignore").strip()
+            p.wait()
+        finally:
+            with self._lock:
+                self._procs.discard(p)
+        if p.returncode != 0 and not self._abort:
+            self.error = err.splitlines()[-1] if err else f"ffmpeg exited with {p.returncode}"
+        return p.returncode == 0
+
+    def _list_file(self, name, paths, durations: bool) -> str:
+        path = os.path.join(self._tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for p in paths:
+                f.write("file '%s'\n" % p.replace("'", "'\\''"))
+                if durations:
+                    f.write(f"duration {1.0 / self.fps:.6f}\n")
+            if durations and paths:
+                f.write("file '%s'\n" % paths[-1].replace("'", "'\\''"))   # concat ignores the last duration
+        return path
+
+    def _encode_segment(self, seg: int) -> bool:
+        if not _ENCODE_SLOTS.acquire(lambda: self._abort or self.error is not None):
+            return False
+        try:
+            lo, hi = self.segments[seg]
+            listing = self._list_file(f"seg{seg}.txt", [self.frames.path(i) for i in range(lo, hi)], True)
+            ext = "mp4" if self.fmt == "MP4" else "mkv"
+            out = os.path.join(self._tmp, f"seg{seg}.{ext}")
+            if self.fmt == "MP4":
+                codec = ["-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2", "-c:v", "libx264",
+                         "-pix_fmt", "yuv420p", "-crf", "18", "-preset", "medium"]
+            else:
+                codec = ["-c:v", "ffv1"]
+            return self._ffmpeg(["-f", "concat", "-safe", "0", "-i", listing, "-r", f"{self.fps:g}",
+                                 "-frames:v", str(hi - lo), "-threads", "1"] + codec + [out], seg)
+        finally:
+            _ENCODE_SLOTS.release()
+
+    def _encode_worker(self, todo):
+        """Encode segments taken from `todo` until it is empty or the run fails."""
+        while not self._abort and self.error is None:
+            try:
+                seg = todo.get_nowait()
+            except queue.Empty:
+                return
+            self._encode_segment(seg)
+
+    def _join(self) -> bool:
+        ext   = "mp4" if self.fmt == "MP4" else "mkv"
+        parts = [os.path.join(self._tmp, f"seg{i}.{ext}") for i in range(len(self.segments))]
+        listing = self._list_file("segments.txt", parts, False)
+        if self.fmt == "MP4":
+            return self._ffmpeg(["-f", "concat", "-safe", "0", "-i", listing, "-c", "copy",
+                                 "-movflags", "+faststart", self.output])
+        # One palette for the whole clip
+        return self._ffmpeg(["-f", "concat", "-safe", "0", "-i", listing, "-filter_complex",
+                             "[0:v]split[a][b];[a]palettegen[p];[b][p]paletteuse", self.output])
+
+    def _run(self):
+        self._exe = shutil.which("ffmpeg")
+        try:
+            if not self._exe:
+                self.error = "ffmpeg not found"
+                return
+            self._tmp = tempfile.mkdtemp(prefix="opengl_notifier_")
+            todo = queue.SimpleQueue()
+            for i in range(len(self.segments)):
+                todo.put(i)
+            workers = [threading.Thread(target=self._encode_worker, args=(todo,), daemon=True)
+                       for _ in range(min(_ENCODE_SLOTS.limit, len(self.segments)))]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            if self._abort or self.error is not None:
+                return
+            self.stage = "joining"
+            self._join()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self._tmp:
+                shutil.rmtree(self._tmp, ignore_errors=True)
+            if self.error is not None:
+                self.stage = "failed"
+                print(f"[OpenGL Notifier] Encode failed ({os.path.basename(self.output)}): {self.error}")
+            elif not self._abort:
+                self.stage = "done"
+                print(f"[OpenGL Notifier] Encoded {self.output}")
+            self.finished = True
+
+# ---------------------------
+# Process resource telemetry (is the renderer CPU-bound, swapping or stalled?)
+# ---------------------------
+# One sampler per process, read from the scheduler pass at most every few
+# seconds: CPU time and memory of the watched process (Blender itself, or
+# --pid when headless) plus the system load average. Linux reads /proc;
+# elsewhere process_time(), getrusage()/psapi and getloadavg() stand in for
+# whatever is available. Each sample's cost is measured, and the interval
+# stretches so sampling never takes more than a fixed share of wall time.
+_SAMPLE_INTERVAL = 2.0      # seconds between samples, at least
+_SAMPLE_DUTY     = 0.0005   # at most this fraction of wall time goes to sampling
+
+def _human_bytes(n) -> str:
+    if n is None:
+        return "—"
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit in ("B", "KB") else f"{n:.1f} {unit}"
+        n /= 1024.0
+
+class _ResourceSampler:
+    """Samples CPU %, RSS/peak RSS/swap and load average of one process (None = not available)."""
+
+    def __init__(self, pid=None):
+        self.set_pid(pid)
+        self.seq      = 0      # bumped on every new sample
+        self.sample   = None   # {"cpu", "rss", "rss_peak", "swap", "load"} of the newest sample
+        self.interval = _SAMPLE_INTERVAL
+        self.cost     = 0.0    # seconds the newest sample took
+        self._last    = None   # (wall time, cpu seconds) of the previous sample
+        self._due     = 0.0
+
+    def set_pid(self, pid=None):
+        self.pid   = pid
+        self._proc = f"/proc/{pid or 'self'}" if os.path.isdir("/proc/self") else None
+        self._tick = os.sysconf("SC_CLK_TCK") if self._proc else None
+        self._last = None
+
+    def poll(self, now: float) -> bool:
+        """Take a sample if one is due. Returns True when a new one is available."""
+        if now < self._due:
+            return False
+        t0 = time.perf_counter()
+        try:
+            cpu_s, rss, rss_peak, swap = self._read_proc() if self._proc else self._read_portable()
+        except Exception:
+            cpu_s = rss = rss_peak = swap = None
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            load = None   # Windows
+        cpu = None
+        if cpu_s is not None and self._last is not None and now > self._last[0]:
+            cpu = max(cpu_s - self._last[1], 0.0) / (now - self._last[0]) * 100.0
+        self._last = (now, cpu_s) if cpu_s is not None else None
+        self.sample = {"cpu": cpu, "rss": rss, "rss_peak": rss_peak, "swap": swap, "load": load}
+        self.seq += 1
+        self.cost = time.perf_counter() - t0
+        self.interval = min(max(_SAMPLE_INTERVAL, self.cost / _SAMPLE_DUTY), 60.0)
+        self._due = now + self.interval
+        return True
+
+    def _read_proc(self):
+        with open(self._proc + "/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / self._tick   # utime + stime
+        mem = {}
+        with open(self._proc + "/status", "rb") as f:
+            for line in f:
+                if line.startswith((b"VmRSS:", b"VmHWM:", b"VmSwap:")):
+                    key, value = line.split(b":", 1)
+                    mem[key] = int(value.split()[0]) * 1024
+        return cpu_s, mem.get(b"VmRSS"), mem.get(b"VmHWM"), mem.get(b"VmSwap")
+
+    def _read_portable(self):
+        if self.pid:
+            return None, None, None, None   # only this process can be sampled without /proc
+        cpu_s = time.process_time()
+        if os.name == "nt":
+            rss, peak = _win_memory()
+            return cpu_s, rss, peak, None
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return cpu_s, None, peak if sys.platform == "darwin" else peak * 1024, None
+
+def _win_memory():
+    """(working set, peak working set) of this process via psapi."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    proc = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(proc, ctypes.byref(counters), counters.cb):
+        return None, None
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+
+class _ResourceStats:
+    """A job's view of the samples taken while it was armed: newest, plus min/avg/max."""
+    __slots__ = ("seq", "last", "n", "cpu_min", "cpu_sum", "cpu_max", "rss_peak", "swap_max", "load_max")
+
+    def __init__(self):
+        self.seq      = 0
+        self.last     = None
+        self.n        = 0
+        self.cpu_min  = None
+        self.cpu_sum  = 0.0
+        self.cpu_max  = None
+        self.rss_peak = None
+        self.swap_max = None
+        self.load_max = None
+
+    def fold(self, sampler: _ResourceSampler):
+        if sampler.seq == self.seq:
+            return
+        self.seq, self.last = sampler.seq, sampler.sample
+        s = sampler.sample
+        if s["cpu"] is not None:
+            self.n       += 1
+            self.cpu_sum += s["cpu"]
+            self.cpu_min  = s["cpu"] if self.cpu_min is None else min(self.cpu_min, s["cpu"])
+            self.cpu_max  = s["cpu"] if self.cpu_max is None else max(self.cpu_max, s["cpu"])
+        for attr, key in (("rss_peak", "rss_peak"), ("rss_peak", "rss"), ("swap_max", "swap"), ("load_max", "load")):
+            if s[key] is not None:
+                old = getattr(self, attr)
+                setattr(self, attr, s[key] if old is None else max(old, s[key]))
+
+    def cpu_avg(self):
+        return (self.cpu_sum / self.n) if self.n else None
+
+    def stats(self) -> dict:
+        """Card fields; empty until the first sample."""
+        s = self.last
+        if s is None:
+            return {}
+        out = {}
+        if s["cpu"] is not None:
+            out["cpu_str"] = f"{s['cpu']:.0f}% (avg {self.cpu_avg():.0f}%, min {self.cpu_min:.0f}%, max {self.cpu_max:.0f}%)"
+        if s["rss"] is not None or self.rss_peak is not None:
+            mem = (f"{_human_bytes(s['rss'])} (peak {_human_bytes(self.rss_peak)})" if s["rss"] is not None
+                   else f"peak {_human_bytes(self.rss_peak)}")   # getrusage only knows the peak
+            if s["swap"]:
+                mem += f", {_human_bytes(s['swap'])} swapped"
+            out["mem_str"] = mem
+        if s["load"] is not None:
+            out["load_str"] = f"{s['load']:.2f} on {os.cpu_count() or '?'} cores (max {self.load_max:.2f})"
+        return out
+
+_RESOURCES = _ResourceSampler()
 
-    # 1) detect real progress (non-empty file modified after arm)
-    progress_started = any(
-        (p.exists() and p.stat().st_size > 0 and p.stat().st_mtime >= start_time)
-        for p in expected
+# ---------------------------
+# Run history (SQLite next to the outbox; seeds the ETA before live timings exist)
+# ---------------------------
+# One row per finished or canceled job. Runs of the same job share a key, a
+# hash of the .blend path, scene, output path and resolution; the index on
+# (key, finished) means a lookup only reads the newest few matching rows, no
+# matter how many runs are stored. Per-frame times and file sizes are packed,
+# zlib-compressed arrays in BLOB columns (not a row per frame), kept only for
+# the newest runs of each job.
+_HISTORY_LOOKBACK = 5       # newest matching runs the prior comes from (and that keep per-frame data)
+_HISTORY_MAX_RUNS = 20000   # older runs are pruned when the store is opened
+_PRIOR_WEIGHT     = 4.0     # live frames after which history and live timings count equally
+
+def _history_key(blend: str, scene: str, output: str, resolution: str) -> str:
+    raw = "\0".join((blend, scene, output, resolution))
+    return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()[:20]
+
+class _History:
+    """Past runs in history.sqlite. Only used from the main thread (arm and finish)."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS runs ("
+        " id INTEGER PRIMARY KEY, job_key TEXT NOT NULL,"
+        " blend TEXT, scene TEXT, output TEXT, resolution TEXT,"
+        " started REAL, finished REAL, outcome TEXT, frames INTEGER, done INTEGER,"
+        " per_frame REAL, times BLOB, sizes BLOB)",
+        "CREATE INDEX IF NOT EXISTS runs_by_key ON runs (job_key, finished)",
     )
+    # Columns added after the first version of the table (added to older files on open)
+    COLUMNS = (("cpu_avg", "REAL"), ("cpu_max", "REAL"), ("rss_peak", "INTEGER"),
+               ("swap_peak", "INTEGER"), ("load_max", "REAL"))
 
-    # Count completed now so stats are always ready
-    exist_count = _count_completed(expected, start_time)
-    all_present = (exist_count >= expected_count)
+    def __init__(self):
+        self._db = None
 
-    # log per-frame time when a new file appears
-    if exist_count > _STATE["prev_exist_count"]:
-        if _STATE["last_frame_t0"] is not None:
-            _STATE["frame_times"].append(now - _STATE["last_frame_t0"])
-        _STATE["last_frame_t0"]   = now
-        _STATE["prev_exist_count"] = exist_count
+    def open(self, folder: str):
+        self.close()
+        try:
+            import sqlite3
+            db = sqlite3.connect(os.path.join(folder, "history.sqlite"), timeout=2.0)
+            db.execute("PRAGMA journal_mode=WAL")   # other instances may read/write it too
+            db.execute("PRAGMA synchronous=NORMAL")
+            for stmt in self.SCHEMA:
+                db.execute(stmt)
+            have = {row[1] for row in db.execute("PRAGMA table_info(runs)")}
+            for name, kind in self.COLUMNS:
+                if name not in have:
+                    db.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+            with db:
+                db.execute("DELETE FROM runs WHERE id <= (SELECT MAX(id) FROM runs) - ?", (_HISTORY_MAX_RUNS,))
+            self._db = db
+        except Exception as e:
+            print("[OpenGL Notifier] Run history unavailable:", e)
 
-    # If nothing has started, just keep waiting
-    if not progress_started:
-        return pf.check_interval
+    def prior(self, key: str):
+        """(seconds per frame, frames it is based on) from the newest matching runs, or None."""
+        if self._db is None or key is None:
+            return None
+        try:
+            rows = self._db.execute(
+                "SELECT per_frame, done FROM runs WHERE job_key = ? AND per_frame IS NOT NULL"
+                " ORDER BY finished DESC LIMIT ?", (key, _HISTORY_LOOKBACK)).fetchall()
+        except Exception as e:
+            print("[OpenGL Notifier] Run history lookup failed:", e)
+            return None
+        frames = sum(done for _per, done in rows)
+        if not frames:
+            return None
+        return sum(per * done for per, done in rows) / frames, frames
+
+    def record(self, job, outcome: str):
+        if self._db is None or job.history_key is None:
+            return
+        blend, scene, output, resolution = job.history_parts
+        res = job.resources or _ResourceStats()
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO runs (job_key, blend, scene, output, resolution, started, finished,"
+                    " outcome, frames, done, per_frame, times, sizes, cpu_avg, cpu_max, rss_peak, swap_peak, load_max)"
+                    " VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (job.history_key, blend, scene, output, resolution, job.start_time, time.time(),
+                     outcome, job.expected_count, job.completion.count, job.timing.mean(),
+                     zlib.compress(job.profile.delta.tobytes()), zlib.compress(job.completion.sizes.tobytes()),
+                     res.cpu_avg(), res.cpu_max, res.rss_peak, res.swap_max, res.load_max))
+                self._db.execute(
+                    "UPDATE runs SET times = NULL, sizes = NULL WHERE job_key = ? AND times IS NOT NULL AND id NOT IN"
+                    " (SELECT id FROM runs WHERE job_key = ? ORDER BY finished DESC LIMIT ?)",
+                    (job.history_key, job.history_key, _HISTORY_LOOKBACK))
+        except Exception as e:
+            print("[OpenGL Notifier] Could not save run history:", e)
+
+    def close(self):
+        if self._db is not None:
+            try:
+                self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+_HISTORY = _History()
 
-    job_type  = "Animation" if _STATE["animation"] else "Single Frame"
-    job_label = _STATE["job_label"]
+# ---------------------------
+# Jobs + shared scheduler
+# ---------------------------
+CANCEL_IDLE_MIN    = 120.0   # at least 2 minutes idle
+CANCEL_IDLE_FACTOR = 5.0     # or 5x the average frame time, whichever is larger
+_EVENTS_RESCAN     = 10.0    # EVENTS mode still lists the output folders this often (s)
+
+class _Job:
+    """State of one armed watcher: expected frames, completion, timing and its Discord card."""
+    __slots__ = (
+        "id", "label", "animation", "expected", "expected_count", "completion",
+        "scanner", "inotify", "first_frame", "last_frame", "last_path",
+        "last_size_time", "start_time", "written_after", "started_posted", "last_progress_post",
+        "prev_exist_count", "timing", "last_frame_t0", "eta_mode",
+        "sinks", "discord_message_id", "next_due", "polls", "finished",
+        "scene_name", "render_watch", "render_seen", "render_gone_at",
+        "render_canceled", "live_frame", "preview_width", "preview_interval",
+        "last_preview_request", "encode_format", "encode_fps", "encode",
+        "profile", "profile_export", "history_parts", "history_key", "prior", "resources",
+        "disk_warned", "last_scan", "output_folder",
+    )
 
-    # Shared timing stats
-    avg = (sum(_STATE["frame_times"]) / len(_STATE["frame_times"])) if _STATE["frame_times"] else None
+    def __init__(self, label, animation, expected, first_frame, last_frame, scan_mode, eta_mode,
+                 sinks, scene_name="", render_watch=False, preview_width=0, preview_interval=0.0,
+                 encode_format='NONE', encode_fps=24.0, history_parts=None, profile_export='NONE',
+                 telemetry=False, written_after=None):
+        events = (scan_mode == 'EVENTS')
+        self.id                 = next(_JOB_IDS)
+        self.label              = label
+        self.animation          = animation
+        self.expected           = expected
+        self.expected_count     = len(expected)
+        self.completion         = _CompletionIndex(len(expected))
+        self.scanner            = _DirScanner(expected) if (events or scan_mode == 'LISTING') else None
+        self.inotify            = _start_inotify(expected.folders()) if events else None
+        self.first_frame        = first_frame
+        self.last_frame         = last_frame
+        self.last_path          = expected.path(len(expected) - 1)
+        # Where the disk, profile and encode outputs are looked up (the first frame's folder)
+        self.output_folder      = os.path.dirname(expected.path(0))
+        self.last_size_time     = (None, 0.0)
+        self.start_time         = time.time()
+        # Files modified before this belong to an earlier render (default: arm time)
+        self.written_after      = self.start_time if written_after is None else written_after
+        self.started_posted     = False
+        self.last_progress_post = 0.0
+        self.prev_exist_count   = 0
+        self.timing             = _FrameStats()
+        self.last_frame_t0      = None
+        self.eta_mode           = eta_mode
+        self.sinks              = sinks
+        # The Discord card's message id, kept in the outbox so replay can close the card (_record_card)
+        self.discord_message_id = None
+        self.next_due           = 0.0
+        self.polls              = 0
+        self.finished           = False
+        # Render handler progress source (animation renders only)
+        self.scene_name         = scene_name
+        self.render_watch       = render_watch
+        self.render_seen        = False   # the viewport render modal was seen running
+        self.render_gone_at     = None    # when it was first seen gone again
+        self.render_canceled    = False   # render_cancel handler fired
+        self.live_frame         = None    # (frame, time) from frame_change_post
+        # Frame preview on the live card (width 0 = off)
+        self.preview_width        = preview_width
+        self.preview_interval     = preview_interval
+        self.last_preview_request = 0.0
+        # Post-render encode ('NONE', 'MP4' or 'GIF'); an _EncodeRun once started
+        self.encode_format        = encode_format
+        self.encode_fps           = encode_fps
+        self.encode               = None
+        # Per-frame profile; written next to the frames when the job ends ('NONE', 'CSV', 'JSON', 'BOTH')
+        self.profile              = _FrameProfile()
+        self.profile_export       = profile_export
+        # Run history: (blend, scene, output, resolution) or None, and the
+        # (seconds per frame, frames) prior from earlier runs of the same job
+        self.history_parts        = history_parts
+        self.history_key          = _history_key(*history_parts) if history_parts else None
+        self.prior                = _HISTORY.prior(self.history_key)
+        # CPU/memory/load samples while armed (None = telemetry off)
+        self.resources            = _ResourceStats() if telemetry else None
+        self.disk_warned          = False   # the "at_risk" event went out
+        self.last_scan            = 0.0     # last full listing in EVENTS mode
+
+    def release(self):
+        """Stop watching: mark finished and release any file-event watch."""
+        self.finished = True
+        _PREVIEWS.forget(self.id)
+        if self.encode is not None and not self.encode.finished:
+            self.encode.cancel()
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+# Armed jobs by id, plus a heap of (next due time, job id) so a scheduler tick
+# only touches jobs that are actually due.
+_JOBS     = {}
+_JOB_HEAP = []
+_TIMER_WAKE = None   # when the Blender timer runs next (None = not registered)
+
+def _list_jobs():
+    """Armed jobs, oldest first."""
+    return list(_JOBS.values())
+
+def _schedule(job: _Job, when: float):
+    """(Re)schedule a job's next pass; older heap entries for it become stale."""
+    job.next_due = when
+    heapq.heappush(_JOB_HEAP, (when, job.id))
+
+def _arm_job(job: _Job, first_interval: float):
+    global _TIMER_WAKE
+    _JOBS[job.id] = job
+    if job.prior is not None:
+        print(f"[OpenGL Notifier] {job.label}: ETA seeded with {job.prior[0]:.2f}s/frame "
+              f"from {job.prior[1]} frames of earlier runs")
+    _schedule(job, time.time() + first_interval)
+    if bpy is None:
+        return
+    if bpy.app.timers.is_registered(_scheduler_timer):
+        if _TIMER_WAKE is not None and _TIMER_WAKE <= job.next_due:
+            return
+        # The timer is backed off past this job's first pass: bring it forward
+        bpy.app.timers.unregister(_scheduler_timer)
+    _TIMER_WAKE = job.next_due
+    # Persistent like the render handlers: a .blend load must not strand armed jobs
+    bpy.app.timers.register(_scheduler_timer, first_interval=first_interval, persistent=True)
+
+def _drop_job(job: _Job):
+    job.release()
+    _JOBS.pop(job.id, None)
+
+def _cancel_job(job_id: int) -> bool:
+    """Cancel an armed job from the UI; posts the canceled card like an interrupted render."""
+    job = _JOBS.get(job_id)
+    if job is None:
+        return False
+    _finish_job(job, "canceled", _job_stats(job, time.time()))
+    return True
+
+def _record_frame_times(job: _Job, fresh):
+    """Turn (completion time, index) pairs (oldest first) into per-frame durations.
+
+    Frames detected on the same poll share one timestamp, so the time since the
+    previous frame is split evenly between them instead of logging zeros.
+    """
+    t_prev = job.last_frame_t0
+    i = 0
+    while i < len(fresh):
+        t = fresh[i][0]
+        k = 1
+        while i + k < len(fresh) and fresh[i + k][0] == t:
+            k += 1
+        per = (max(t - t_prev, 0.0) / k) if t_prev is not None else None
+        for _t, index in fresh[i:i + k]:
+            if per is not None:
+                job.timing.add(per)
+            job.profile.add(index, t, per)
+        t_prev = t
+        i += k
+    job.last_frame_t0 = t_prev
+
+def _per_frame(job: _Job):
+    """Seconds per frame for the ETA: the live estimate, pulled towards the
+    history prior while only a few frames have been timed."""
+    live = job.timing.estimate(job.eta_mode)
+    if job.prior is None:
+        return live
+    prior, n = job.prior[0], job.timing.count
+    if live is None or n == 0:
+        return prior
+    return (prior * _PRIOR_WEIGHT + live * n) / (_PRIOR_WEIGHT + n)
+
+_DISK_CHECK_INTERVAL = 10.0   # seconds a free-space reading of a folder is reused
+_DISK_MARGIN         = 1.1    # the projected remaining output is padded by this factor
+_DISK_MIN_FRAMES     = 2      # frames needed before the average frame size is trusted
+_DISK_FREE = {}               # folder -> (time read, free bytes or None)
+
+def _disk_free(folder: str, now: float):
+    """Free bytes on the volume holding `folder`, re-read at most every _DISK_CHECK_INTERVAL."""
+    hit = _DISK_FREE.get(folder)
+    if hit is not None and now - hit[0] < _DISK_CHECK_INTERVAL:
+        return hit[1]
+    try:
+        free = shutil.disk_usage(folder).free
+    except OSError:
+        free = None
+    _DISK_FREE[folder] = (now, free)
+    return free
+
+def _disk_stats(job: _Job, now: float) -> dict:
+    """Output throughput, and the remaining output projected against the free space."""
+    done = job.completion
+    if done.count < _DISK_MIN_FRAMES or not done.bytes:
+        return {}
+    avg_size = done.bytes / done.count
+    # Up to the newest frame, not `now`: the value only moves when a frame lands,
+    # so an idle card still counts as unchanged (see _embed_signature)
+    last = job.last_frame_t0 if job.last_frame_t0 is not None else now
+    rate = done.bytes / max(last - job.start_time, 1e-6)
+    out = {"throughput_str": f"{_human_bytes(rate)}/s · {_human_bytes(avg_size)} per frame"}
+    free = _disk_free(job.output_folder, now)
+    if free is None:
+        return out
+    need = avg_size * max(job.expected_count - done.count, 0) * _DISK_MARGIN
+    out.update(disk_str=f"{_human_bytes(need)} more needed · {_human_bytes(free)} free",
+               disk_need_str=_human_bytes(need), disk_free_str=_human_bytes(free),
+               disk_at_risk=need > free)
+    return out
+
+def _job_stats(job: _Job, now: float) -> dict:
+    """The stats dict the Discord embeds are built from."""
+    exist_count    = job.completion.count
+    expected_count = job.expected_count
+
+    avg = job.timing.mean()
+    per_frame = _per_frame(job)
     remaining = max(expected_count - exist_count, 0)
-    eta = (avg * remaining) if (avg is not None) else None
-    cur_frame_num = _STATE["first_frame"] + exist_count - 1 if _STATE["animation"] else bpy.context.scene.frame_current
-    last_frame_time = _STATE["frame_times"][-1] if _STATE["frame_times"] else None
-    elapsed = now - start_time
+    eta = (per_frame * remaining) if (per_frame is not None) else None
+    eta_str = _human_secs(eta)
+    if eta is not None and remaining and not job.timing:
+        eta_str += " (from past runs)"
+    cur_frame_num = job.expected.frame(max(exist_count - 1, 0))
+    if job.live_frame is not None and job.render_gone_at is None:
+        cur_frame_num = job.live_frame[0]   # frame Blender is rendering right now
+    last_frame_time = job.timing.last
+    elapsed = now - job.start_time
     pct = (exist_count / expected_count * 100.0) if expected_count else 100.0
     progress_str = f"{exist_count}/{expected_count} ({pct:.1f}%)" if expected_count else "—"
 
-    stats = {
-        "job_label": job_label,
-        "job_type": job_type,
+    return {
+        "job_label": job.label,
+        "job_type": "Animation" if job.animation else "Single Frame",
         "total_frames": expected_count,
-        "first_frame": _STATE["first_frame"],
-        "last_frame": _STATE["last_frame"],
+        "first_frame": job.first_frame,
+        "last_frame": job.last_frame,
         "current_frame": cur_frame_num,
         "progress_str": progress_str,
         "last_frame_time_str": _human_secs(last_frame_time),
         "avg_time_str": _human_secs(avg),
-        "eta_str": _human_secs(eta),
+        "eta_str": eta_str,
         "elapsed_str": _human_secs(elapsed),
         "total_elapsed_str": _human_secs(elapsed),
+        **(job.resources.stats() if job.resources is not None else {}),
+        **_disk_stats(job, now),
     }
 
+def _finish_job(job: _Job, stage: str, stats: dict):
+    """Publish the final event for a job ("done" or "canceled") and drop it."""
+    ps = _poll_stats(job, time.time())
+    print(f"[OpenGL Notifier] {job.label}: {ps['polls']} watcher passes (fixed interval would have made {ps['fixed_polls']})")
+    if job.resources is not None and job.resources.seq:
+        print(f"[OpenGL Notifier] {job.label}: telemetry sample took {_RESOURCES.cost * 1000:.2f} ms, "
+              f"every {_RESOURCES.interval:.1f}s")
+    if stage == "done":
+        print("[OpenGL Notifier] Viewport render finished.")
+        text = f"✅ Viewport render complete — {job.label} ({stats.get('progress_str', '')})"
+        prof = job.profile.summary(job.expected)
+        stats["frame_pct_str"] = " / ".join(_frame_secs(prof[k]) for k in ("p50", "p95", "max"))
+        stats["slowest_str"]   = ", ".join(f"{frame} ({_frame_secs(dt)})" for frame, dt in prof["slowest"]) or "—"
+    else:
+        print("[OpenGL Notifier] Viewport render appears canceled or interrupted.")
+        text = f"⛔ Viewport render canceled — {job.label} ({stats.get('progress_str', '')})"
+
+    _publish(job, stage, stats, text)
+    _HISTORY.record(job, stage)
+    if job.profile_export != 'NONE' and job.expected_count > 1 and len(job.profile):
+        # Not a daemon: a headless watcher waits for the file before exiting
+        base = os.path.join(job.output_folder, _file_stem(job.label) + "_profile")
+        threading.Thread(target=_export_profile, name="OpenGLNotifier-profile",
+                         args=(job.profile, job.expected, job.completion.sizes, base, job.profile_export)).start()
+    _drop_job(job)
+
+def _next_interval(job: _Job, pf, now: float, settling: bool) -> float:
+    """Seconds until a job's next pass, from the observed frame cadence.
+
+    Polls quickly when a frame is due (or while the last frame settles), backs
+    off halfway towards the next expected frame during long frames, and eases
+    off gradually when a frame is overdue. Always within the floor/ceiling.
+    """
+    if job.render_gone_at is not None:
+        # The render modal ended: come back when its grace period is over
+        grace_left = max(job.render_gone_at + _RENDER_GONE_GRACE - now, 0.05)
+    else:
+        grace_left = float("inf")
+
+    if not pf.adaptive_polling:
+        return min(pf.check_interval, grace_left)
+    floor   = pf.poll_floor
+    ceiling = max(pf.poll_ceiling, floor)
+
+    per = _per_frame(job)
+    if settling:
+        interval = pf.stable_delay / 4.0
+    elif per is None or job.last_frame_t0 is None:
+        interval = pf.check_interval   # no cadence yet
+    else:
+        due_in = job.last_frame_t0 + per - now
+        if due_in > 0:
+            interval = due_in / 2.0
+        else:
+            interval = max(per, -due_in) / 4.0
+    return min(max(interval, floor), ceiling, grace_left)
+
+def _poll_stats(job: _Job, now: float) -> dict:
+    """Watcher passes actually made vs. what the fixed check interval would have made."""
+    fixed = int((now - job.start_time) / max(_config().check_interval, 0.01))
+    return {"polls": job.polls, "fixed_polls": fixed}
+
+def _file_stem(label: str) -> str:
+    """A job label made safe to use as a file name next to the frames."""
+    return re.sub(r"[^\w\-.]", "_", label).strip("._") or "render"
+
+def _start_encode(job: _Job, pf, now: float):
+    """All frames are in: hand them to a background _EncodeRun and show the encoding card."""
+    name = _file_stem(job.label) + (".mp4" if job.encode_format == 'MP4' else ".gif")
+    output = os.path.join(job.output_folder, name)
+    job.encode = _EncodeRun(job.expected, job.encode_fps, job.encode_format, pf.encode_segment, output)
+    job.encode.start()
+    print(f"[OpenGL Notifier] {job.label}: encoding {len(job.encode.segments)} segments → {output}")
+    if job.started_posted:
+        stats = _job_stats(job, now)
+        stats.update(job.encode.stats())
+        _publish(job, "encoding", stats)
+        job.last_progress_post = now
+
+def _tick_encode(job: _Job, pf, now: float):
+    """Watcher pass for a job whose frames are being encoded: progress on the card, then the done card."""
+    run   = job.encode
+    stats = _job_stats(job, now)
+    stats.update(run.stats())
+    if run.finished:
+        _finish_job(job, "done", stats)
+        return None
+    if job.started_posted and now - job.last_progress_post >= pf.update_interval:
+        _publish(job, "encoding", stats)
+        job.last_progress_post = now
+    return min(max(pf.update_interval / 2.0, 0.5), 5.0)
+
+def _tick_job(job: _Job, pf, now: float):
+    """One watcher pass over a job. Returns seconds until its next pass, or None when it is over."""
+    job.polls += 1
+    if job.encode is not None:
+        return _tick_encode(job, pf, now)
+    expected       = job.expected
+    written_after  = job.written_after
+    last_path      = job.last_path
+    last_size, last_t = job.last_size_time
+
+    # 1) detect real progress (non-empty file modified after arm).
+    # Only frames still pending are stat'ed; finished ones stay in the index.
+    completion = job.completion
+    watcher    = job.inotify
+    if watcher is not None and not watcher.failed:
+        for folder, name, t in watcher.drain():
+            job.scanner.check(completion, folder, name, written_after, t)
+        job.scanner.recheck(completion, written_after, now)
+        if now - job.last_scan >= _EVENTS_RESCAN:
+            # Safety net for files that never send a close/move event: writes
+            # from another host on NFS/SMB, hard links
+            job.last_scan = now
+            job.scanner.scan(completion, written_after, now)
+    elif job.scanner is not None:
+        job.scanner.scan(completion, written_after, now)
+    else:
+        _poll_completed(completion, expected, written_after, now)
+
+    # Count completed now so stats are always ready
+    exist_count = completion.count
+    progress_started = exist_count > 0
+    all_present = completion.complete
+
+    # log per-frame time when a new file appears
+    fresh = completion.take_fresh()
+    if fresh:
+        _record_frame_times(job, fresh)
+        job.prev_exist_count = exist_count
+
+    # Fast cancel from the render handlers: Blender canceled the render, or the
+    # viewport render modal ended (and a grace pass found frames still missing)
+    if not all_present and (job.render_canceled or (
+            job.render_gone_at is not None and now - job.render_gone_at >= _RENDER_GONE_GRACE)):
+        _finish_job(job, "canceled", _job_stats(job, now))
+        return None
+
+    # If nothing has started, just keep waiting
+    if not progress_started:
+        return _next_interval(job, pf, now, settling=False)
+
+    stats = _job_stats(job, now)
+    avg   = job.timing.mean()
+
     # --- Cancellation heuristic: treat as canceled if very idle mid-job ---
     # Only applies after at least one frame is done and before all are present.
-    if _STATE["frame_times"] and _STATE["last_frame_t0"] is not None and not (all_present):
-        idle = now - _STATE["last_frame_t0"]
+    if job.timing and job.last_frame_t0 is not None and not all_present:
+        idle = now - job.last_frame_t0
         if avg is not None and avg > 0:
             idle_threshold = max(CANCEL_IDLE_MIN, CANCEL_IDLE_FACTOR * avg)
         else:
@@ -525,424 +3225,1075 @@ def _watcher_timer():
 
         if idle >= idle_threshold:
             # treat as canceled or interrupted
-            total_elapsed = now - start_time
-            stats["elapsed_str"]       = _human_secs(total_elapsed)
-            stats["total_elapsed_str"] = _human_secs(total_elapsed)
-
-            print("[OpenGL Notifier] Viewport render appears canceled or interrupted.")
-            _notify_local("Viewport render canceled")
-
-            if pf.enable_discord:
-                # "canceled" stage → red embed, explanatory text
-                embed = _discord_build_embed("canceled", stats)
-                msg_id = _STATE.get("discord_message_id")
-                if msg_id:
-                    _discord_edit_embed(msg_id, embed)
-                else:
-                    _discord_post_embed(embed)
-
-                # NEW: single plain text cancel message
-                progress_str = stats.get("progress_str", "")
-                try:
-                    _post_discord(f"⛔ Viewport render canceled — {job_label} ({progress_str})")
-                except Exception:
-                    pass
-
-            _STATE["armed"] = False
+            _finish_job(job, "canceled", stats)
             return None
 
-    # 2) First time we see progress: create the embed message
-    if progress_started and not started_posted and pf.enable_discord:
-        _STATE["started_posted"] = True
-        _STATE["last_frame_t0"]  = now
-
-        embed = _discord_build_embed("start", stats)
-        msg_id = _discord_post_embed(embed)
-        if msg_id:
-            _STATE["discord_message_id"] = msg_id
+    # 2) First time we see progress: "start" event (creates the Discord card)
+    if not job.started_posted and job.sinks:
+        job.started_posted = True
+        _publish(job, "start", stats)
 
-    # 3) stability check for the very last frame file
-    all_stable = False
-    if all_present and last_path is not None and last_path.exists():
+    # 3) stability check for the very last frame file. Formats with a validator
+    # were already checked byte-for-byte when the frame was marked finished.
+    all_stable = all_present and _has_validator(last_path)
+    if all_present and not all_stable and last_path is not None:
         try:
-            size = last_path.stat().st_size
-        except Exception:
+            size = os.stat(last_path).st_size
+        except OSError:
             size = None
 
         if size is None or size != last_size:
-            _STATE["last_size_time"] = (size, now)  # changed → reset
-        else:
-            if now - last_t >= pf.stable_delay:
-                all_stable = True
-
-    # 4) throttled Discord progress (while not fully complete)
-    if pf.enable_discord and _STATE["started_posted"] and not (all_present and all_stable):
-        if now - _STATE["last_progress_post"] >= pf.update_interval:
+            job.last_size_time = (size, now)  # changed → reset
+        elif now - last_t >= pf.stable_delay:
+            all_stable = True
+
+    # Early warning: the rest of the frames will not fit on the output disk
+    if stats.get("disk_at_risk") and not job.disk_warned and job.started_posted and not all_present:
+        job.disk_warned = True
+        print(f"[OpenGL Notifier] {job.label}: output disk may fill up "
+              f"({stats['disk_need_str']} needed, {stats['disk_free_str']} free)")
+        _publish(job, "at_risk", stats,
+                 f"⚠️ Output disk may fill up — {job.label}: {stats['disk_need_str']} still to write, "
+                 f"{stats['disk_free_str']} free ({stats.get('progress_str', '')})")
+        job.last_progress_post = now
+
+    # Newest finished frame → preview encoder (off-thread); it rides along
+    # with the next progress edit of the card
+    if (job.preview_width and job.started_posted and completion.cursor
+            and now - job.last_preview_request >= job.preview_interval):
+        job.last_preview_request = now
+        _PREVIEWS.request(job.id, expected.path(completion.cursor - 1), job.preview_width)
+
+    # 4) throttled progress events (while not fully complete)
+    if job.started_posted and not (all_present and all_stable):
+        if now - job.last_progress_post >= pf.update_interval:
             # PROGRESS ONLY – note the "progress" stage
-            embed = _discord_build_embed("progress", stats)
-            msg_id = _STATE.get("discord_message_id")
-            if msg_id:
-                _discord_edit_embed(msg_id, embed)
-            else:
-                # If the start message failed, create one now
-                msg_id = _discord_post_embed(embed)
-                if msg_id:
-                    _STATE["discord_message_id"] = msg_id
-
-            _STATE["last_progress_post"] = now
+            # (on Discord an edit creates the card if the start message failed)
+            _publish(job, "progress", stats)
+            job.last_progress_post = now
 
-    # 5) completion
+    # 5) completion (optionally encode first; the done card comes after it)
     if all_present and all_stable:
-        total_elapsed = now - start_time
-        avg = (sum(_STATE["frame_times"]) / len(_STATE["frame_times"])) if _STATE["frame_times"] else None
-        stats["avg_time_str"]        = _human_secs(avg)
-        stats["elapsed_str"]         = _human_secs(total_elapsed)
-        stats["total_elapsed_str"]   = _human_secs(total_elapsed)
+        if job.encode_format != 'NONE' and job.expected_count > 1:
+            _start_encode(job, pf, now)
+            return 0.5
+        _finish_job(job, "done", stats)
+        return None
 
-        print("[OpenGL Notifier] Viewport render finished.")
-        _notify_local("Viewport render complete")
-
-        if pf.enable_discord:
-            # Final embed → "done" stage (green bar, ✅ title)
-            embed = _discord_build_embed("done", stats)
-            msg_id = _STATE.get("discord_message_id")
-            if msg_id:
-                _discord_edit_embed(msg_id, embed)
-            else:
-                _discord_post_embed(embed)
+    return _next_interval(job, pf, now, settling=all_present)
 
-            # NEW: single plain text message to trigger a fresh mobile notification
-            progress_str = stats.get("progress_str", "")
-            try:
-                _post_discord(f"✅ Viewport render complete — {job_label} ({progress_str})")
-            except Exception:
-                pass
+def _scheduler_timer():
+    """The one scheduler pass that services every armed job (a Blender timer, or the headless loop)."""
+    global _TIMER_WAKE
+    pf  = _config()
+    now = time.time()
 
-        _STATE["armed"] = False
+    # Card ids created by the delivery worker come back asynchronously
+    for job_id, msg_id in _DELIVERY.drain_results():
+        job = _JOBS.get(job_id)
+        if job is not None:
+            job.discord_message_id = msg_id
+            _record_card(job, _job_stats(job, now))
+
+    render_jobs = _watch_render_modal(now)
+
+    sampled = [job for job in _JOBS.values() if job.resources is not None]
+    if sampled and _RESOURCES.poll(now):
+        for job in sampled:
+            job.resources.fold(_RESOURCES)
+
+    while _JOB_HEAP and _JOB_HEAP[0][0] <= now:
+        due, job_id = heapq.heappop(_JOB_HEAP)
+        job = _JOBS.get(job_id)
+        if job is None or job.finished or due != job.next_due:
+            continue  # canceled, or a stale heap entry
+        try:
+            interval = _tick_job(job, pf, now)
+        except Exception as e:
+            print(f"[OpenGL Notifier] Watcher error ({job.label}), stopping it:", e)
+            _drop_job(job)
+            continue
+        if interval is None:
+            continue
+        _schedule(job, now + interval)
+
+    # Drop heap entries of jobs that are gone so the next wake-up is accurate
+    while _JOB_HEAP and _JOB_HEAP[0][1] not in _JOBS:
+        heapq.heappop(_JOB_HEAP)
+    if not _JOB_HEAP:
+        _TIMER_WAKE = None
         return None
-
-
-    return pf.check_interval
+    wait = max(_JOB_HEAP[0][0] - time.time(), 0.05)
+    if render_jobs:
+        # Keep an eye on the render modal even while the jobs themselves back off
+        wait = min(wait, _RENDER_CHECK_INTERVAL)
+    _TIMER_WAKE = time.time() + wait
+    return wait
 
 # ---------------------------
-# Operator to start watcher
+# Render handlers (optional progress/cancel source, faster than the file system)
 # ---------------------------
-class OPENGLNOTIFIER_OT_start(Operator):
-    bl_idname = "openglnotifier.start_watcher"
-    bl_label = "Start Watcher (Viewport/OpenGL)"
-    bl_description = "Arm the watcher; then run your OpenGL/Viewport render"
+_RENDER_CHECK_INTERVAL = 0.5   # how often the render modal is looked for (s)
+_RENDER_GONE_GRACE     = 1.0   # time for the last frame to be picked up after the modal ends (s)
 
-    animation: BoolProperty(
-        name="Watch Animation Range",
-        description="If on, watch full frame range; if off, only current frame",
-        default=True,
-    )
+def _opengl_render_running():
+    """True/False whether a viewport render modal is running; None if this Blender cannot tell."""
+    wm = bpy.context.window_manager
+    if wm is None:
+        return None
+    for win in wm.windows:
+        ops = getattr(win, "modal_operators", None)   # Blender 4.2+
+        if ops is None:
+            return None
+        if any(op.bl_idname == "RENDER_OT_opengl" for op in ops):
+            return True
+    return False
+
+def _watch_render_modal(now: float) -> bool:
+    """Track the render modal for handler-driven jobs. Returns True if any are armed."""
+    jobs = [job for job in _JOBS.values() if job.render_watch]
+    if not jobs:
+        return False
+
+    running = _opengl_render_running()
+    for job in jobs:
+        if running:
+            job.render_seen = True
+            job.render_gone_at = None
+        elif running is False and job.render_seen and job.render_gone_at is None:
+            job.render_gone_at = now
+            _schedule(job, now)   # pick up the last frame right away
+        if job.render_canceled and job.next_due > now:
+            _schedule(job, now)
+    return True
+
+# Blender drops non-persistent handlers when a .blend is loaded, which would
+# leave a running job without frame or cancel reports for the rest of the session.
+_persistent = bpy.app.handlers.persistent if bpy is not None else (lambda fn: fn)
+
+@_persistent
+def _on_frame_change(scene, depsgraph=None):
+    now = time.time()
+    for job in _JOBS.values():
+        if job.render_watch and job.scene_name == scene.name and job.render_gone_at is None:
+            job.live_frame = (scene.frame_current, now)
+
+@_persistent
+def _on_render_cancel(scene, depsgraph=None):
+    for job in _JOBS.values():
+        if job.render_watch and job.scene_name == scene.name:
+            job.render_canceled = True
+
+_RENDER_HANDLERS = (
+    ("frame_change_post", _on_frame_change),
+    ("render_cancel", _on_render_cancel),
+)
 
-    def execute(self, context):
-        pf = _prefs()
-        scene = context.scene
-        r = scene.render
-
-        expected = _expected_paths(scene, r, self.animation)
-        if not expected:
-            self.report({'ERROR'}, "No expected output path (check Output > File Path)")
-            return {'CANCELLED'}
-
-        raw_label = bpy.path.display_name_from_filepath(bpy.path.abspath(r.filepath)) or scene.name or "Viewport Render"
-
-        # Strip trailing frame token hashes (e.g. "####")
-        job_label = raw_label.rstrip('#').rstrip()  # removes #### ONLY at the end
-
-        _STATE.update({
-            "armed": True,
-            "animation": bool(self.animation),
-            "expected": expected,
-            "expected_count": len(expected),
-            "first_frame": scene.frame_start if self.animation else scene.frame_current,
-            "last_frame": scene.frame_end if self.animation else scene.frame_current,
-            "last_path": expected[-1],
-            "last_size_time": (None, 0.0),
-            "start_time": time.time(),
-            "started_posted": False,
-            "last_progress_post": 0.0,
-            "prev_exist_count": 0,
-            "frame_times": [],
-            "last_frame_t0": None,
-            "discord_message_id": None,
-            "job_label": job_label,
-        })
-
-        bpy.app.timers.register(_watcher_timer, first_interval=pf.check_interval)
-        self.report({'INFO'}, f"Watcher armed for {'animation' if self.animation else 'current frame'}")
-        return {'FINISHED'}
+def _stop_all_jobs():
+    for job in _list_jobs():
+        _drop_job(job)
+    _JOB_HEAP.clear()
+    if bpy is not None and bpy.app.timers.is_registered(_scheduler_timer):
+        bpy.app.timers.unregister(_scheduler_timer)
 
 # ---------------------------
-# Preferences UI
+# Aggregation hub (many instances → one dashboard card, posted at a fixed cadence)
 # ---------------------------
-class OPENGLNOTIFIER_Preferences(AddonPreferences):
-    bl_idname = _addon_idname()
+# Instances with "Report to Hub" send every job event as one UDP datagram:
+# {"v": 1, "src": "<host>:<pid>", "event": <the sink event>}. The hub keeps
+# the latest state per job and edits a single Discord card once per interval
+# at most, however many renders report to it.
+_HUB_PORT   = 47800
+_SOURCE     = f"{socket.gethostname()}:{os.getpid()}"
+_HUB_SOCK   = None
+_HUB_FIELDS = 25   # Discord's limit of fields per embed
+
+def _hub_socket():
+    global _HUB_SOCK
+    if _HUB_SOCK is None:
+        _HUB_SOCK = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return _HUB_SOCK
+
+class _Hub:
+    """Latest state of every reported job, rendered as one dashboard embed."""
+
+    def __init__(self, target, interval: float, linger: float, stale_after: float = 300.0):
+        self.target      = target
+        self.interval    = interval
+        self.linger      = linger        # how long finished jobs stay on the card
+        self.stale_after = stale_after   # running jobs without reports are flagged after this
+        self.jobs        = {}            # (source, job id) -> state dict
+        self.reports     = 0
+
+    def handle(self, data: bytes, now: float):
+        try:
+            msg = json.loads(data.decode("utf-8"))
+            event = msg["event"]
+            key = (str(msg["src"]), str(event["job_id"]))
+        except (ValueError, KeyError, TypeError):
+            return
+        self.reports += 1
+        job = self.jobs.setdefault(key, {"host": key[0].rpartition(":")[0] or key[0], "stats": {}})
+        job.update(label=event.get("job") or "Render", stage=event.get("event"), seen=now)
+        job["stats"] = event.get("stats") or job["stats"]
+
+    def embed(self, now: float) -> dict:
+        for key in [k for k, j in self.jobs.items()
+                    if now - j["seen"] > (self.linger if j["stage"] in ("done", "canceled") else self.stale_after + self.linger)]:
+            del self.jobs[key]
+        jobs    = sorted(self.jobs.values(), key=lambda j: (j["stage"] in ("done", "canceled"), j["label"]))
+        active  = [j for j in jobs if j["stage"] not in ("done", "canceled")]
+        fields  = []
+        for j in jobs[:_HUB_FIELDS]:
+            st = j["stats"]
+            if j["stage"] == "done":
+                state = "✅ done"
+            elif j["stage"] == "canceled":
+                state = "⛔ canceled"
+            elif now - j["seen"] > self.stale_after:
+                state = "⚠️ no reports"
+            elif j["stage"] == "encoding":
+                state = f"encoding {st.get('encode_format', '')}".rstrip()
+            else:
+                state = f"rendering, ETA {st.get('eta_str', '—')}"
+                if st.get("disk_at_risk"):
+                    state += " · ⚠️ disk may fill up"
+            fields.append({"name": f"{j['label']} @ {j['host']}",
+                           "value": f"{st.get('progress_str', '—')} · {state}", "inline": False})
+        hosts = {j["host"] for j in jobs}
+        if any(j["stats"].get("disk_at_risk") for j in active):
+            color = _ORANGE
+        elif active:
+            color = _BLUE
+        elif any(j["stage"] == "canceled" for j in jobs):
+            color = _RED
+        else:
+            color = _GREEN
+        desc = f"{len(active)} rendering · {len(jobs)} jobs on {len(hosts)} machine(s)"
+        if len(jobs) > _HUB_FIELDS:
+            desc += f" · {len(jobs) - _HUB_FIELDS} more not shown"
+        return {"title": "Render dashboard", "description": desc, "color": color, "fields": fields}
+
+    def serve(self, host: str, port: int):
+        """Receive reports and refresh the card every `interval` seconds, until interrupted."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        print(f"[OpenGL Notifier] Hub listening on {host}:{port}, card every {self.interval:g}s")
+        next_post = time.monotonic() + self.interval
+        try:
+            while True:
+                timeout = max(next_post - time.monotonic(), 0.0)
+                readable, _, _ = select.select([sock], [], [], timeout)
+                if readable:
+                    data, _ = sock.recvfrom(65535)
+                    self.handle(data, time.time())
+                    continue
+                next_post = time.monotonic() + self.interval
+                if self.jobs:
+                    # Coalesced and skipped when unchanged, like any progress edit
+                    _DELIVERY.submit_progress(self.target, "hub", self.embed(time.time()))
+        finally:
+            sock.close()
 
-    webhook_url: StringProperty(
-        name="Discord Webhook URL",
-        description="Paste the Discord webhook URL for the channel/thread",
-        default="",
-    )
-    discord_username: StringProperty(
-        name="Discord Display Name",
-        description="Name to show in Discord",
-        default="OpenGL Notifier"
-    )
-    discord_avatar_url: StringProperty(
-        name="Discord Avatar URL",
-        description="Optional image URL for the webhook user",
-        default="",
-    )
-    enable_discord: BoolProperty(
-        name="Send to Discord",
-        description="Post start/progress/completion to Discord",
-        default=True
-    )
-    enable_sound: BoolProperty(
-        name="Desktop Sound",
-        description="Play a short sound when complete",
-        default=True
-    )
-    enable_custom_sound: bpy.props.BoolProperty(
-        name="Custom Sound",
-        description="Play this audio file instead of the default beep",
-        default=False
-    )
-    custom_sound_path: bpy.props.StringProperty(
-        name="Sound File",
-        description="Choose an mp3/wav/flac/etc. to play on completion",
-        subtype='FILE_PATH',
-        default=""
-    )
-    enable_toast: BoolProperty(
-        name="Desktop Toast",
-        description="Show a system toast/notification when complete",
-        default=True
-    )
-    check_interval: FloatProperty(
-        name="Check Interval (s)",
-        description="Seconds between checks (gentle polling)",
-        min=0.1, max=5.0, default=1.0
-    )
-    stable_delay: FloatProperty(
-        name="Stable Delay (s)",
-        description="How long the last frame must stop growing before considered done",
-        min=0.5, max=10.0, default=1.5
-    )
-    update_interval: FloatProperty(
-        name="Discord Update Interval (s)",
-        description="Throttle progress updates to Discord",
-        min=2.0, max=120.0, default=5.0
+# ---------------------------
+# Headless watcher CLI (python -m OpenGL_Notifier watch ...), no Blender needed
+# ---------------------------
+def _default_state_dir() -> str:
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "opengl_notifier")
+
+def _parse_job_spec(spec: str):
+    """'TEMPLATE@START-END[xSTEP]' (or '@FRAME') → (template, start, end, step)."""
+    template, sep, frames = spec.rpartition("@")
+    m = re.fullmatch(r"(-?\d+)(?:-(-?\d+))?(?:x(\d+))?", frames)
+    if not sep or not template or m is None:
+        raise ValueError(f"{spec!r}: expected TEMPLATE@START-END[xSTEP], e.g. /out/shot_####.png@1-250")
+    start = int(m.group(1))
+    end   = int(m.group(2)) if m.group(2) is not None else start
+    step  = int(m.group(3) or 1)
+    if end < start or step < 1:
+        raise ValueError(f"{spec!r}: empty frame range")
+    return template, start, end, step
+
+def _parse_since(value: str) -> float:
+    """--since: Unix time, or an ISO 8601 date/time (local time unless it has an offset)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    import datetime
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"--since {value!r}: expected Unix time or ISO 8601, e.g. 2026-10-17T09:30") from None
+
+def _headless_config(args):
+    """The settings the core reads, from the command line instead of the add-on preferences."""
+    return types.SimpleNamespace(
+        check_interval=args.check_interval, adaptive_polling=not args.no_adaptive,
+        poll_floor=args.poll_floor, poll_ceiling=args.poll_ceiling,
+        stable_delay=args.stable_delay, update_interval=args.update_interval,
+        encode_segment=args.encode_segment, sink_timeout=args.timeout,
+        discord_target=_discord_target(args.discord or "", args.discord_name, args.discord_avatar, args.timeout),
+        json_webhook=args.webhook or "", slack_webhook=args.slack or "", hub=args.hub or "",
+        event_log=os.path.abspath(args.event_log) if args.event_log else "",
+        enable_sound=args.desktop, enable_toast=args.desktop,
+        enable_custom_sound=False, custom_sound_path="",
     )
 
-    def draw(self, context):
-        layout = self.layout
-        col = layout.column(align=True)
-
-        # --- Discord section ---
-        col.label(text="Discord", icon='URL')
-        col.prop(self, "webhook_url")
-        col.prop(self, "discord_username")
-        col.prop(self, "discord_avatar_url")
-
-        row = col.row(align=True)
-        row.prop(self, "enable_discord")
-
-        # Test Discord button
-        row = col.row(align=True)
-        row.operator("openglnotifier.test_discord", icon='PLAY')
-        col.separator()
-
-        # --- Desktop Notifications section ---
-        col.label(text="Desktop Notifications", icon='SPEAKER')
-
-        row = col.row(align=True)
-        row.prop(self, "enable_sound")
-        row.prop(self, "enable_toast", text="Desktop Popup")
-
-        col.prop(self, "enable_custom_sound")
-        row = col.row(align=True)
-        row.enabled = self.enable_custom_sound
-        row.prop(self, "custom_sound_path")
-
-        # Test buttons
-        row = col.row(align=True)
-        row.operator("openglnotifier.test_sound", icon='PLAY')
-        row.operator("openglnotifier.test_popup", icon='PLAY')
-        col.separator()
-
-        # --- Watcher Timing section ---
-        col.label(text="Watcher Timing", icon='TIME')
-        row = col.row(align=True)
-        row.prop(self, "check_interval")
-        row.prop(self, "stable_delay")
-        row.prop(self, "update_interval")
-        col.separator()
-
-        import platform
-        sys = platform.system()
-
-        # --- Windows Toast help / PowerShell instructions (Windows only) ---
-        if sys == "Windows":
-            help_box = col.box()
-            help_box.label(text="Windows Toast Setup (PowerShell)", icon='INFO')
-
-            help_box.label(text="If Desktop Popup is enabled but no toast appears on Windows, you may need to:")
-            help_box.separator()
-
-            # 1) Install BurntToast and test
-            help_box.label(text="1) Install BurntToast for your user and test a popup:")
-            hb1 = help_box.column(align=True)
-            hb1.label(text="   # Run these in PowerShell")
-            hb1.label(text="   Install-Module BurntToast -Scope CurrentUser -Force")
-            hb1.label(text="   Import-Module BurntToast")
-            hb1.label(text="   New-BurntToastNotification -Text 'Blender test', 'It worked!'")
-            help_box.separator()
-
-            # 2) Execution policy notes
-            help_box.label(text="2) If PowerShell blocks scripts, you may need to allow local scripts:")
-            hb2 = help_box.column(align=True)
-            hb2.label(text="   # Loosen policy for your user (allows local scripts)")
-            hb2.label(text="   Set-ExecutionPolicy RemoteSigned -Scope CurrentUser -Force")
-            help_box.separator()
-
-            help_box.label(text="3) To tighten policy again afterwards, you can restore the default:")
-            hb3 = help_box.column(align=True)
-            hb3.label(text="   # Restore stricter policy for your user")
-            hb3.label(text="   Set-ExecutionPolicy Restricted -Scope CurrentUser -Force")
-
-        # --- Linux hint for notify-send ---
-        if sys == "Linux":
-            help_box = col.box()
-            help_box.label(text="Linux Notification Hint", icon='INFO')
-            help_box.label(text="Desktop Popup uses `notify-send` if available.")
-            help_box.label(text="If no popup appears, make sure libnotify / notify-send is installed")
-            help_box.label(text="and that your desktop environment shows standard notifications.")
-
-def execute(self, context):
-    pf = _prefs()
-    if pf.enable_custom_sound and pf.custom_sound_path:
-        _play_custom_sound(pf.custom_sound_path)
-    else:
-        _play_only_sound()
-    self.report({'INFO'}, "Sound test played.")
-    return {'FINISHED'}
-
-class OPENGLNOTIFIER_OT_test_discord(bpy.types.Operator):
-    bl_idname = "openglnotifier.test_discord"
-    bl_label = "Test Discord"
-    bl_description = "Send a test message to the configured Discord webhook"
-
-    def execute(self, context):
-        pf = _prefs()
-        if not pf.enable_discord:
-            self.report({'WARNING'}, "Discord notifications are disabled")
-            return {'CANCELLED'}
-        if not pf.webhook_url.strip():
-            self.report({'WARNING'}, "No Discord webhook URL set")
-            return {'CANCELLED'}
-
-        _post_discord("OpenGL Notifier: **Discord test successful**")
-        self.report({'INFO'}, "Discord test sent (check your channel)")
-        return {'FINISHED'}
-
-class OPENGLNOTIFIER_OT_test_popup(bpy.types.Operator):
-    bl_idname = "openglnotifier.test_popup"
-    bl_label = "Test Popup"
-    bl_description = "Show a test Windows popup notification"
-
-    def execute(self, context):
-        pf = _prefs()
-        if not pf.enable_toast:
-            self.report({'WARNING'}, "Desktop Popup is disabled")
-            return {'CANCELLED'}
-        _popup_only("OpenGL Notifier: Popup test successful")
-        self.report({'INFO'}, "Popup test triggered")
-        return {'FINISHED'}
-
-class OPENGLNOTIFIER_OT_test_sound(bpy.types.Operator):
-    bl_idname = "openglnotifier.test_sound"
-    bl_label = "Test Sound"
-    bl_description = "Play the selected custom sound if enabled, otherwise the default beep"
+def _cli_parser():
+    import argparse
+    ap = argparse.ArgumentParser(
+        prog="python -m OpenGL_Notifier",
+        description="Watch rendered frame sequences and send the same notifications as the Blender add-on.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    w = sub.add_parser("watch", help="watch one or more frame sequences until they are complete")
+    w.add_argument("jobs", nargs="+", metavar="TEMPLATE@START-END[xSTEP]",
+                   help="output path with # for the frame number, e.g. '/out/shot_####.png@1-250'")
+    w.add_argument("--label", action="append", default=[], help="job label, once per job (default: from the file name)")
+    w.add_argument("--discord", metavar="URL", help="Discord webhook URL (live card)")
+    w.add_argument("--discord-name", default="OpenGL Notifier", help="Discord display name")
+    w.add_argument("--discord-avatar", default="", metavar="URL", help="Discord avatar image URL")
+    w.add_argument("--webhook", metavar="URL", help="POST every event as JSON to this URL")
+    w.add_argument("--slack", metavar="URL", help="Slack-compatible incoming webhook URL")
+    w.add_argument("--event-log", metavar="PATH", help="append every event as a JSON line to this file")
+    w.add_argument("--desktop", action="store_true", help="desktop sound + popup when a job ends")
+    w.add_argument("--hub", metavar="HOST:PORT", help="report to an aggregation hub")
+    w.add_argument("--timeout", type=float, default=10.0, help="per-destination send timeout (s)")
+    w.add_argument("--scan-mode", choices=("STAT", "LISTING", "EVENTS"), default="LISTING",
+                   help="LISTING (default) also sees frames other machines write to a share; "
+                        "EVENTS uses inotify and suits local disks")
+    w.add_argument("--since", metavar="TIME",
+                   help="count frames written after TIME (Unix time or ISO 8601) instead of only those "
+                        "written after the watcher started, e.g. when the render is already running")
+    w.add_argument("--include-existing", action="store_true",
+                   help="count frames that are already there, whenever they were written")
+    w.add_argument("--eta", choices=("MEAN", "RECENT", "EWMA"), default="EWMA")
+    w.add_argument("--check-interval", type=float, default=1.0)
+    w.add_argument("--update-interval", type=float, default=5.0)
+    w.add_argument("--stable-delay", type=float, default=1.5)
+    w.add_argument("--no-adaptive", action="store_true", help="check at a fixed interval")
+    w.add_argument("--poll-floor", type=float, default=0.1)
+    w.add_argument("--poll-ceiling", type=float, default=10.0)
+    w.add_argument("--encode", choices=("NONE", "MP4", "GIF"), default="NONE", help="encode the frames when done")
+    w.add_argument("--fps", type=float, default=24.0, help="frame rate for --encode")
+    w.add_argument("--profile", choices=("NONE", "CSV", "JSON", "BOTH"), default="NONE",
+                   help="write a per-frame timing profile next to the frames when a job of more than one frame ends")
+    w.add_argument("--encode-workers", type=int, default=2)
+    w.add_argument("--encode-segment", type=int, default=120)
+    w.add_argument("--pid", type=int, help="add CPU/memory/load fields to the card for this process, e.g. the "
+                                           "Blender rendering the frames (needs Linux /proc)")
+    w.add_argument("--state-dir", default=_default_state_dir(),
+                   help="where the notification outbox and run history live")
+    w.add_argument("--no-history", action="store_true", help="do not record runs or seed the ETA from earlier ones")
+
+    h = sub.add_parser("hub", help="merge reports from many instances into one Discord dashboard card")
+    h.add_argument("--discord", metavar="URL", required=True, help="Discord webhook URL for the dashboard card")
+    h.add_argument("--discord-name", default="OpenGL Notifier", help="Discord display name")
+    h.add_argument("--discord-avatar", default="", metavar="URL", help="Discord avatar image URL")
+    h.add_argument("--listen", default=f"127.0.0.1:{_HUB_PORT}", metavar="HOST:PORT",
+                   help="UDP address to listen on (0.0.0.0 for the LAN)")
+    h.add_argument("--interval", type=float, default=10.0, help="seconds between card updates")
+    h.add_argument("--linger", type=float, default=600.0, help="seconds finished jobs stay on the card")
+    return ap
+
+def _cli_hub(args) -> int:
+    host, _, port = args.listen.rpartition(":")
+    hub = _Hub(_discord_target(args.discord, args.discord_name, args.discord_avatar),
+               max(args.interval, 2.0), args.linger)
+    try:
+        hub.serve(host or "127.0.0.1", int(port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _DELIVERY.stop(10.0)
+        _HTTP_POOL.close_all()
+    return 0
+
+def _cli_watch(args) -> int:
+    global _CONFIG
+    _CONFIG = cfg = _headless_config(args)
+    _ENCODE_SLOTS.set_limit(args.encode_workers)
+    _replay_outbox(args.state_dir)
+    if not args.no_history:
+        _HISTORY.open(args.state_dir)
+    _RESOURCES.set_pid(args.pid)
+    try:
+        since = 0.0 if args.include_existing else (_parse_since(args.since) if args.since else None)
+    except ValueError as e:
+        print("[OpenGL Notifier]", e)
+        return 2
 
-    def execute(self, context):
-        pf = _prefs()
-        if getattr(pf, "enable_custom_sound", False) and getattr(pf, "custom_sound_path", ""):
-            _play_custom_sound(pf.custom_sound_path)
-        else:
-            _play_only_sound()
-        self.report({'INFO'}, "Sound test played.")
-        return {'FINISHED'}
+    for n, spec in enumerate(args.jobs):
+        try:
+            template, start, end, step = _parse_job_spec(spec)
+        except ValueError as e:
+            print("[OpenGL Notifier]", e)
+            return 2
+        expected = _FrameSet.from_template(template, start, end, step)
+        label = args.label[n] if n < len(args.label) else (
+            os.path.basename(template).split("#")[0].rstrip("_-. ") or "Render")
+        job = _Job(label, True, expected, start, end, args.scan_mode, args.eta, _build_sinks(cfg),
+                   encode_format=args.encode, encode_fps=args.fps,
+                   history_parts=None if args.no_history else ("", "", os.path.abspath(template), ""),
+                   profile_export=args.profile, telemetry=args.pid is not None, written_after=since)
+        _arm_job(job, cfg.check_interval)
+        print(f"[OpenGL Notifier] Watching {label}: {len(expected)} frames ({template})")
+
+    code = 0
+    try:
+        while _JOBS:
+            wait = _scheduler_timer()
+            if wait is None:
+                break
+            time.sleep(wait)
+    except KeyboardInterrupt:
+        now = time.time()
+        for job in _list_jobs():
+            _finish_job(job, "canceled", _job_stats(job, now))
+        code = 130
+    finally:
+        _FANOUT.stop(30.0)
+        _DELIVERY.stop(30.0)
+        _DESKTOP.stop()
+        _HTTP_POOL.close_all()
+        _OUTBOX.close()
+        _HISTORY.close()
+    return code
+
+def _cli_main(argv=None) -> int:
+    args = _cli_parser().parse_args(argv)
+    if args.command == "watch":
+        return _cli_watch(args)
+    if args.command == "hub":
+        return _cli_hub(args)
+    return 2
 
 # ---------------------------
-# Render Menu Items
+# Blender add-on: operators, preferences and registration over the core above
 # ---------------------------
+if bpy is not None:
+    # ---------------------------
+    # Operators to start / cancel watchers
+    # ---------------------------
+    class OPENGLNOTIFIER_OT_start(Operator):
+        bl_idname = "openglnotifier.start_watcher"
+        bl_label = "Start Watcher (Viewport/OpenGL)"
+        bl_description = "Arm the watcher; then run your OpenGL/Viewport render"
+
+        animation: BoolProperty(
+            name="Watch Animation Range",
+            description="If on, watch full frame range; if off, only current frame",
+            default=True,
+        )
 
-class OPENGLNOTIFIER_OT_viewport_render_notify_frame(bpy.types.Operator):
-    bl_idname = "openglnotifier.viewport_render_notify_frame"
-    bl_label = "Viewport Render Image (with Notifications)"
-    bl_description = "Render the current viewport as an image and send notifications"
-
-    def execute(self, context):
-        # Arm watcher for single frame
-        bpy.ops.openglnotifier.start_watcher(animation=False)
-        # Start viewport render for current frame
-        bpy.ops.render.opengl('INVOKE_DEFAULT', animation=False)
-        return {'FINISHED'}
+        def execute(self, context):
+            pf = _config()
+            scene = context.scene
+            r = scene.render
+
+            expected = _FrameSet.from_scene(scene, r, self.animation)
+            if not len(expected):
+                self.report({'ERROR'}, "No expected output path (check Output > File Path)")
+                return {'CANCELLED'}
+
+            raw_label = bpy.path.display_name_from_filepath(bpy.path.abspath(r.filepath)) or scene.name or "Viewport Render"
+
+            # Strip trailing frame token hashes (e.g. "####")
+            job_label = raw_label.rstrip('#').rstrip()  # removes #### ONLY at the end
+
+            job = _Job(
+                label=job_label,
+                animation=bool(self.animation),
+                expected=expected,
+                first_frame=scene.frame_start if self.animation else scene.frame_current,
+                last_frame=scene.frame_end if self.animation else scene.frame_current,
+                scan_mode=pf.scan_mode,
+                eta_mode=pf.eta_estimator,
+                sinks=_build_sinks(pf),
+                scene_name=scene.name,
+                render_watch=bool(self.animation and pf.use_render_handlers),
+                preview_width=pf.preview_width if pf.enable_preview else 0,
+                preview_interval=pf.preview_interval,
+                encode_format=pf.encode_format if self.animation else 'NONE',
+                encode_fps=r.fps / (r.fps_base or 1.0),
+                history_parts=(bpy.data.filepath, scene.name, bpy.path.abspath(r.filepath),
+                               f"{r.resolution_x}x{r.resolution_y} {r.resolution_percentage}%")
+                              if pf.use_history else None,
+                profile_export=pf.profile_export,
+                telemetry=pf.enable_telemetry,
+            )
+            _ENCODE_SLOTS.set_limit(pf.encode_workers)
+            _DELIVERY.preview_budget.set_rate(pf.preview_kb_per_min * 1024 / 60.0)
+            _arm_job(job, pf.check_interval)
+
+            self.report({'INFO'}, f"Watcher armed for {'animation' if self.animation else 'current frame'}")
+            return {'FINISHED'}
+
+    class OPENGLNOTIFIER_OT_cancel_job(Operator):
+        bl_idname = "openglnotifier.cancel_job"
+        bl_label = "Cancel Watcher"
+        bl_description = "Stop watching this job and post it as canceled"
+
+        job_id: IntProperty(name="Job", default=0)
+
+        def execute(self, context):
+            if not _cancel_job(self.job_id):
+                self.report({'WARNING'}, "That watcher is no longer running")
+                return {'CANCELLED'}
+            self.report({'INFO'}, "Watcher canceled")
+            return {'FINISHED'}
+
+    # ---------------------------
+    # Preferences UI
+    # ---------------------------
+    class OPENGLNOTIFIER_Preferences(AddonPreferences):
+        bl_idname = _addon_idname()
+
+        webhook_url: StringProperty(
+            name="Discord Webhook URL",
+            description="Paste the Discord webhook URL for the channel/thread",
+            default="",
+            update=_config_changed,
+        )
+        discord_username: StringProperty(
+            name="Discord Display Name",
+            description="Name to show in Discord",
+            default="OpenGL Notifier",
+            update=_config_changed,
+        )
+        discord_avatar_url: StringProperty(
+            name="Discord Avatar URL",
+            description="Optional image URL for the webhook user",
+            default="",
+            update=_config_changed,
+        )
+        enable_discord: BoolProperty(
+            name="Send to Discord",
+            description="Post start/progress/completion to Discord",
+            default=True,
+            update=_config_changed,
+        )
+        enable_json_webhook: BoolProperty(
+            name="Send to JSON Webhook",
+            description="POST every job event as JSON to a webhook URL",
+            default=False,
+            update=_config_changed,
+        )
+        json_webhook_url: StringProperty(
+            name="JSON Webhook URL",
+            description="Receives start/progress/encoding/done/canceled events as JSON",
+            default="",
+            update=_config_changed,
+        )
+        enable_slack: BoolProperty(
+            name="Send to Slack",
+            description="Post start/completion messages to a Slack-compatible incoming webhook",
+            default=False,
+            update=_config_changed,
+        )
+        slack_webhook_url: StringProperty(
+            name="Slack Webhook URL",
+            description="Slack (or compatible) incoming webhook URL",
+            default="",
+            update=_config_changed,
+        )
+        enable_jsonl: BoolProperty(
+            name="Write Event Log",
+            description="Append every job event as a JSON line to a local file",
+            default=False,
+            update=_config_changed,
+        )
+        jsonl_path: StringProperty(
+            name="Event Log File",
+            description="JSONL file the events are appended to",
+            subtype='FILE_PATH',
+            default="",
+            update=_config_changed,
+        )
+        enable_hub: BoolProperty(
+            name="Report to Hub",
+            description=("Send progress to an aggregation hub (python -m OpenGL_Notifier hub) that keeps one "
+                         "dashboard card for all machines, instead of posting this instance's own Discord card"),
+            default=False,
+            update=_config_changed,
+        )
+        hub_address: StringProperty(
+            name="Hub Address",
+            description="host:port of the hub (port 47800 if omitted)",
+            default="127.0.0.1:47800",
+            update=_config_changed,
+        )
+        sink_timeout: FloatProperty(
+            name="Send Timeout (s)",
+            description="Per-destination timeout for the Discord, JSON and Slack webhooks",
+            min=1.0, max=60.0, default=10.0,
+            update=_config_changed,
+        )
+        enable_preview: BoolProperty(
+            name="Frame Preview",
+            description="Show a small image of the newest finished frame on the live Discord card (needs ffmpeg)",
+            default=False,
+            update=_config_changed,
+        )
+        preview_width: IntProperty(
+            name="Preview Width (px)",
+            description="Width the preview image is scaled down to",
+            min=64, max=1280, default=320,
+            update=_config_changed,
+        )
+        preview_interval: FloatProperty(
+            name="Preview Interval (s)",
+            description="Minimum time between preview refreshes",
+            min=5.0, max=600.0, default=30.0,
+            update=_config_changed,
+        )
+        preview_kb_per_min: IntProperty(
+            name="Preview Upload (KB/min)",
+            description="Upload budget for preview images; previews are skipped while it is used up",
+            min=16, max=8192, default=600,
+            update=_config_changed,
+        )
+        enable_sound: BoolProperty(
+            name="Desktop Sound",
+            description="Play a short sound when complete",
+            default=True,
+            update=_config_changed,
+        )
+        enable_custom_sound: bpy.props.BoolProperty(
+            name="Custom Sound",
+            description="Play this audio file instead of the default beep",
+            default=False,
+            update=_config_changed,
+        )
+        custom_sound_path: bpy.props.StringProperty(
+            name="Sound File",
+            description="Choose an mp3/wav/flac/etc. to play on completion",
+            subtype='FILE_PATH',
+            default="",
+            update=_config_changed,
+        )
+        enable_toast: BoolProperty(
+            name="Desktop Toast",
+            description="Show a system toast/notification when complete",
+            default=True,
+            update=_config_changed,
+        )
+        check_interval: FloatProperty(
+            name="Check Interval (s)",
+            description="Seconds between checks (gentle polling)",
+            min=0.1, max=5.0, default=1.0,
+            update=_config_changed,
+        )
+        adaptive_polling: BoolProperty(
+            name="Adaptive Polling",
+            description="Check more often when a frame is due and less often during long frames",
+            default=True,
+            update=_config_changed,
+        )
+        poll_floor: FloatProperty(
+            name="Fastest Check (s)",
+            description="Shortest time between checks with adaptive polling",
+            min=0.05, max=5.0, default=0.1,
+            update=_config_changed,
+        )
+        poll_ceiling: FloatProperty(
+            name="Slowest Check (s)",
+            description="Longest time between checks with adaptive polling",
+            min=0.5, max=60.0, default=10.0,
+            update=_config_changed,
+        )
+        stable_delay: FloatProperty(
+            name="Stable Delay (s)",
+            description="How long the last frame must stop growing before considered done",
+            min=0.5, max=10.0, default=1.5,
+            update=_config_changed,
+        )
+        update_interval: FloatProperty(
+            name="Discord Update Interval (s)",
+            description="Throttle progress updates to Discord",
+            min=2.0, max=120.0, default=5.0,
+            update=_config_changed,
+        )
+        encode_format: EnumProperty(
+            name="Encode After Render",
+            description="Encode the finished frames with ffmpeg; progress shows on the same Discord card",
+            items=(
+                ('NONE', "Off", "Keep the image sequence only"),
+                ('MP4', "MP4", "H.264 video next to the frames"),
+                ('GIF', "GIF", "Animated GIF next to the frames"),
+            ),
+            default='NONE',
+            update=_config_changed,
+        )
+        encode_workers: IntProperty(
+            name="Encode Workers",
+            description="Maximum ffmpeg processes at once, across all jobs (leave room for another render)",
+            min=1, max=32, default=2,
+            update=_config_changed,
+        )
+        encode_segment: IntProperty(
+            name="Frames per Segment",
+            description="Frames each encode process handles; the segments are joined at the end",
+            min=10, max=10000, default=120,
+            update=_config_changed,
+        )
+        use_render_handlers: BoolProperty(
+            name="Follow Blender Render Events",
+            description=("Use Blender's frame-change and render handlers (and the running viewport render) "
+                         "for live frame progress and near-instant cancel detection; files on disk are still checked"),
+            default=True,
+            update=_config_changed,
+        )
+        eta_estimator: EnumProperty(
+            name="ETA Estimate",
+            description="Per-frame time used to estimate the remaining time",
+            items=(
+                ('MEAN', "Whole-run average", "Average of every frame so far"),
+                ('RECENT', "Recent frames", "Average of the last 32 frames; follows changes in scene complexity"),
+                ('EWMA', "Smoothed", "Exponentially weighted average that favors recent frames"),
+            ),
+            default='EWMA',
+            update=_config_changed,
+        )
+        profile_export: EnumProperty(
+            name="Frame Timing Export",
+            description="When an animation job ends, write frame number, completion time, seconds and bytes of every frame next to the frames",
+            items=(
+                ('NONE', "Off", "Do not write a frame profile"),
+                ('CSV', "CSV", "<label>_profile.csv"),
+                ('JSON', "JSON", "<label>_profile.json"),
+                ('BOTH', "CSV + JSON", "Both files"),
+            ),
+            default='NONE',
+            update=_config_changed,
+        )
+        enable_telemetry: BoolProperty(
+            name="Resource Telemetry",
+            description="Show Blender's CPU use, memory (RSS, peak, swap) and the system load on the card and in the run history",
+            default=True,
+            update=_config_changed,
+        )
+        use_history: BoolProperty(
+            name="Learn From Past Runs",
+            description=("Keep a history of finished renders and use earlier runs of the same job "
+                         "(.blend, scene, output path and resolution) for the ETA until enough frames are timed"),
+            default=True,
+            update=_config_changed,
+        )
+        scan_mode: EnumProperty(
+            name="Frame Detection",
+            description="How the watcher looks for finished frames",
+            items=(
+                ('STAT', "Per-file", "Check each pending frame file directly (best for local disks)"),
+                ('LISTING', "Folder listing", "Read each output folder once per check (best for NFS/SMB network shares)"),
+                ('EVENTS', "File events", "Linux: get told about new frames by inotify (plus a folder listing every 10 s for writes it cannot see); elsewhere, or if unavailable, falls back to folder listing"),
+            ),
+            default='EVENTS',
+            update=_config_changed,
+        )
 
-class OPENGLNOTIFIER_OT_viewport_render_notify_anim(bpy.types.Operator):
-    bl_idname = "openglnotifier.viewport_render_notify_anim"
-    bl_label = "Viewport Render Animation (with Notifications)"
-    bl_description = "Render the viewport animation and send notifications"
+        def draw(self, context):
+            layout = self.layout
+            col = layout.column(align=True)
+
+            # --- Discord section ---
+            col.label(text="Discord", icon='URL')
+            col.prop(self, "webhook_url")
+            col.prop(self, "discord_username")
+            col.prop(self, "discord_avatar_url")
+
+            row = col.row(align=True)
+            row.prop(self, "enable_discord")
+            row.prop(self, "enable_preview")
+            row = col.row(align=True)
+            row.enabled = self.enable_preview
+            row.prop(self, "preview_width")
+            row.prop(self, "preview_interval")
+            row.prop(self, "preview_kb_per_min")
+
+            # Test Discord button
+            row = col.row(align=True)
+            row.operator("openglnotifier.test_discord", icon='PLAY')
+
+            c = _delivery_counters()
+            col.label(text=(f"Webhook traffic: {c['sent']} sent, {c['throttled'] + c['deferred']} throttled, "
+                            f"{c['rate_limited']} rate-limited, {c['retried']} retried, "
+                            f"{c['coalesced'] + c['unchanged']} updates saved"))
+            col.separator()
+
+            # --- Other destinations ---
+            col.label(text="Other Destinations", icon='EXPORT')
+            row = col.row(align=True)
+            row.prop(self, "enable_json_webhook", text="")
+            row.prop(self, "json_webhook_url")
+            row = col.row(align=True)
+            row.prop(self, "enable_slack", text="")
+            row.prop(self, "slack_webhook_url")
+            row = col.row(align=True)
+            row.prop(self, "enable_jsonl", text="")
+            row.prop(self, "jsonl_path")
+            row = col.row(align=True)
+            row.prop(self, "enable_hub", text="")
+            row.prop(self, "hub_address")
+            col.prop(self, "sink_timeout")
+            failed = {name: c["failed"] for name, c in _FANOUT.counters.items() if c["failed"]}
+            if failed:
+                col.label(text="Failed deliveries: " + ", ".join(f"{n} {k}" for n, k in failed.items()), icon='ERROR')
+            col.separator()
+
+            # --- Desktop Notifications section ---
+            col.label(text="Desktop Notifications", icon='SPEAKER')
+
+            row = col.row(align=True)
+            row.prop(self, "enable_sound")
+            row.prop(self, "enable_toast", text="Desktop Popup")
+
+            col.prop(self, "enable_custom_sound")
+            row = col.row(align=True)
+            row.enabled = self.enable_custom_sound
+            row.prop(self, "custom_sound_path")
+
+            # Test buttons
+            row = col.row(align=True)
+            row.operator("openglnotifier.test_sound", icon='PLAY')
+            row.operator("openglnotifier.test_popup", icon='PLAY')
+            col.separator()
+
+            # --- Active jobs ---
+            jobs = _list_jobs()
+            if jobs:
+                col.label(text="Active Watchers", icon='RENDER_ANIMATION')
+                for job in jobs:
+                    row = col.row(align=True)
+                    ps = _poll_stats(job, time.time())
+                    row.label(text=(f"{job.label}: {job.completion.count}/{job.expected_count} frames, "
+                                    f"{ps['polls']} checks (fixed: {ps['fixed_polls']})"))
+                    op = row.operator("openglnotifier.cancel_job", text="", icon='X')
+                    op.job_id = job.id
+                col.separator()
+
+            # --- Watcher Timing section ---
+            col.label(text="Watcher Timing", icon='TIME')
+            row = col.row(align=True)
+            row.prop(self, "check_interval")
+            row.prop(self, "stable_delay")
+            row.prop(self, "update_interval")
+            col.prop(self, "adaptive_polling")
+            row = col.row(align=True)
+            row.enabled = self.adaptive_polling
+            row.prop(self, "poll_floor")
+            row.prop(self, "poll_ceiling")
+            col.prop(self, "scan_mode")
+            col.prop(self, "use_render_handlers")
+            col.prop(self, "eta_estimator")
+            col.prop(self, "use_history")
+            col.prop(self, "profile_export")
+            col.prop(self, "enable_telemetry")
+            col.separator()
+
+            # --- Encode section ---
+            col.label(text="Encode", icon='FILE_MOVIE')
+            col.prop(self, "encode_format")
+            row = col.row(align=True)
+            row.enabled = self.encode_format != 'NONE'
+            row.prop(self, "encode_workers")
+            row.prop(self, "encode_segment")
+            col.separator()
+
+            import platform
+            sys = platform.system()
+
+            # --- Windows Toast help / PowerShell instructions (Windows only) ---
+            if sys == "Windows":
+                help_box = col.box()
+                help_box.label(text="Windows Toast Setup (PowerShell)", icon='INFO')
+
+                help_box.label(text="If Desktop Popup is enabled but no toast appears on Windows, you may need to:")
+                help_box.separator()
+
+                # 1) Install BurntToast and test
+                help_box.label(text="1) Install BurntToast for your user and test a popup:")
+                hb1 = help_box.column(align=True)
+                hb1.label(text="   # Run these in PowerShell")
+                hb1.label(text="   Install-Module BurntToast -Scope CurrentUser -Force")
+                hb1.label(text="   Import-Module BurntToast")
+                hb1.label(text="   New-BurntToastNotification -Text 'Blender test', 'It worked!'")
+                help_box.separator()
+
+                # 2) Execution policy notes
+                help_box.label(text="2) If PowerShell blocks scripts, you may need to allow local scripts:")
+                hb2 = help_box.column(align=True)
+                hb2.label(text="   # Loosen policy for your user (allows local scripts)")
+                hb2.label(text="   Set-ExecutionPolicy RemoteSigned -Scope CurrentUser -Force")
+                help_box.separator()
+
+                help_box.label(text="3) To tighten policy again afterwards, you can restore the default:")
+                hb3 = help_box.column(align=True)
+                hb3.label(text="   # Restore stricter policy for your user")
+                hb3.label(text="   Set-ExecutionPolicy Restricted -Scope CurrentUser -Force")
+
+            # --- Linux hint for notify-send ---
+            if sys == "Linux":
+                help_box = col.box()
+                help_box.label(text="Linux Notification Hint", icon='INFO')
+                help_box.label(text="Desktop Popup uses `notify-send` if available.")
+                help_box.label(text="If no popup appears, make sure libnotify / notify-send is installed")
+                help_box.label(text="and that your desktop environment shows standard notifications.")
+
+    # Every preference, plus the resolved Discord target (None = off), webhook URLs
+    # ("" = off), event log path and hub address
+    _PREF_NAMES = tuple(OPENGLNOTIFIER_Preferences.__annotations__)
+    _Config = collections.namedtuple(
+        "_Config", _PREF_NAMES + ("discord_target", "json_webhook", "slack_webhook", "event_log", "hub"))
 
     def execute(self, context):
-        # Arm watcher for full frame range
-        bpy.ops.openglnotifier.start_watcher(animation=True)
-        # Start viewport render animation
-        bpy.ops.render.opengl('INVOKE_DEFAULT', animation=True)
+        pf = _config()
+        if pf.enable_custom_sound and pf.custom_sound_path:
+            _DESKTOP.sound(pf.custom_sound_path)
+        else:
+            _DESKTOP.beep()
+        self.report({'INFO'}, "Sound test played.")
         return {'FINISHED'}
 
-def opengl_notifier_view_menu(self, context):
-    layout = self.layout
-    layout.separator()
-    layout.operator(
-        "openglnotifier.viewport_render_notify_frame",
-        text="Viewport Render Image (with Notifications)",
-        icon='RENDER_STILL'
-    )
-    layout.operator(
-        "openglnotifier.viewport_render_notify_anim",
-        text="Viewport Render Animation (with Notifications)",
-        icon='RENDER_ANIMATION'
+    class OPENGLNOTIFIER_OT_test_discord(bpy.types.Operator):
+        bl_idname = "openglnotifier.test_discord"
+        bl_label = "Test Discord"
+        bl_description = "Send a test message to the configured Discord webhook"
+
+        def execute(self, context):
+            pf = _config()
+            if not pf.enable_discord:
+                self.report({'WARNING'}, "Discord notifications are disabled")
+                return {'CANCELLED'}
+            if not pf.discord_target:
+                self.report({'WARNING'}, "No Discord webhook URL set")
+                return {'CANCELLED'}
+
+            _DELIVERY.submit("text", pf.discord_target, body="OpenGL Notifier: **Discord test successful**")
+            self.report({'INFO'}, "Discord test sent (check your channel)")
+            return {'FINISHED'}
+
+    class OPENGLNOTIFIER_OT_test_popup(bpy.types.Operator):
+        bl_idname = "openglnotifier.test_popup"
+        bl_label = "Test Popup"
+        bl_description = "Show a test Windows popup notification"
+
+        def execute(self, context):
+            pf = _config()
+            if not pf.enable_toast:
+                self.report({'WARNING'}, "Desktop Popup is disabled")
+                return {'CANCELLED'}
+            _DESKTOP.toast("OpenGL Notifier: Popup test successful")
+            self.report({'INFO'}, "Popup test triggered")
+            return {'FINISHED'}
+
+    class OPENGLNOTIFIER_OT_test_sound(bpy.types.Operator):
+        bl_idname = "openglnotifier.test_sound"
+        bl_label = "Test Sound"
+        bl_description = "Play the selected custom sound if enabled, otherwise the default beep"
+
+        def execute(self, context):
+            pf = _config()
+            if getattr(pf, "enable_custom_sound", False) and getattr(pf, "custom_sound_path", ""):
+                _DESKTOP.sound(pf.custom_sound_path)
+            else:
+                _DESKTOP.beep()
+            self.report({'INFO'}, "Sound test played.")
+            return {'FINISHED'}
+
+    # ---------------------------
+    # Render Menu Items
+    # ---------------------------
+
+    class OPENGLNOTIFIER_OT_viewport_render_notify_frame(bpy.types.Operator):
+        bl_idname = "openglnotifier.viewport_render_notify_frame"
+        bl_label = "Viewport Render Image (with Notifications)"
+        bl_description = "Render the current viewport as an image and send notifications"
+
+        def execute(self, context):
+            # Arm watcher for single frame
+            bpy.ops.openglnotifier.start_watcher(animation=False)
+            # Start viewport render for current frame
+            bpy.ops.render.opengl('INVOKE_DEFAULT', animation=False)
+            return {'FINISHED'}
+
+    class OPENGLNOTIFIER_OT_viewport_render_notify_anim(bpy.types.Operator):
+        bl_idname = "openglnotifier.viewport_render_notify_anim"
+        bl_label = "Viewport Render Animation (with Notifications)"
+        bl_description = "Render the viewport animation and send notifications"
+
+        def execute(self, context):
+            # Arm watcher for full frame range
+            bpy.ops.openglnotifier.start_watcher(animation=True)
+            # Start viewport render animation
+            bpy.ops.render.opengl('INVOKE_DEFAULT', animation=True)
+            return {'FINISHED'}
+
+    def opengl_notifier_view_menu(self, context):
+        layout = self.layout
+        layout.separator()
+        layout.operator(
+            "openglnotifier.viewport_render_notify_frame",
+            text="Viewport Render Image (with Notifications)",
+            icon='RENDER_STILL'
+        )
+        layout.operator(
+            "openglnotifier.viewport_render_notify_anim",
+            text="Viewport Render Animation (with Notifications)",
+            icon='RENDER_ANIMATION'
+        )
+        layout.separator()
+
+    # ---------------------------
+    # Registration
+    # ---------------------------
+    CLASSES = (
+        OPENGLNOTIFIER_OT_start,
+        OPENGLNOTIFIER_OT_cancel_job,
+        OPENGLNOTIFIER_Preferences,
+        OPENGLNOTIFIER_OT_test_sound,
+        OPENGLNOTIFIER_OT_test_discord,
+        OPENGLNOTIFIER_OT_test_popup,
+        OPENGLNOTIFIER_OT_viewport_render_notify_frame,
+        OPENGLNOTIFIER_OT_viewport_render_notify_anim,
     )
-    layout.separator()
-
-# ---------------------------
-# Registration
-# ---------------------------
-CLASSES = (
-    OPENGLNOTIFIER_OT_start,
-    OPENGLNOTIFIER_Preferences,
-    OPENGLNOTIFIER_OT_test_sound,
-    OPENGLNOTIFIER_OT_test_discord,
-    OPENGLNOTIFIER_OT_test_popup,
-    OPENGLNOTIFIER_OT_viewport_render_notify_frame,
-    OPENGLNOTIFIER_OT_viewport_render_notify_anim,
-)
 
-def register():
-    for c in CLASSES:
-        bpy.utils.register_class(c)
-    bpy.types.VIEW3D_MT_view.append(opengl_notifier_view_menu)
-
-def unregister():
-    bpy.types.VIEW3D_MT_view.remove(opengl_notifier_view_menu)
-    for c in reversed(CLASSES):
-        bpy.utils.unregister_class(c)
+    def register():
+        global _CONFIG
+        _CONFIG = None
+        for c in CLASSES:
+            bpy.utils.register_class(c)
+        bpy.types.VIEW3D_MT_view.append(opengl_notifier_view_menu)
+        for name, fn in _RENDER_HANDLERS:
+            handlers = getattr(bpy.app.handlers, name, None)
+            if handlers is not None and fn not in handlers:
+                handlers.append(fn)
+        _DESKTOP.probe()
+        folder = bpy.utils.user_resource('CONFIG', path="opengl_notifier", create=True)
+        _replay_outbox(folder)
+        _HISTORY.open(folder)
+
+    def unregister():
+        for name, fn in _RENDER_HANDLERS:
+            handlers = getattr(bpy.app.handlers, name, None)
+            if handlers is not None and fn in handlers:
+                handlers.remove(fn)
+        _stop_all_jobs()
+        _FANOUT.stop()
+        _DELIVERY.stop()
+        _PREVIEWS.forget_all()
+        _DESKTOP.stop()
+        _HTTP_POOL.close_all()
+        _OUTBOX.close()
+        _HISTORY.close()
+        bpy.types.VIEW3D_MT_view.remove(opengl_notifier_view_menu)
+        for c in reversed(CLASSES):
+            bpy.utils.unregister_class(c)
 
 if __name__ == "__main__":
-    register()
+    if bpy is not None:
+        register()   # run from Blender's text editor
+    else:
+        sys.exit(_cli_main())
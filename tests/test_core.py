@@ -0,0 +1,228 @@
+"""Pure-Python core: expected frames, the completion index, frame validators and statistics."""
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OpenGL_Notifier as ogn
+
+PNG = ogn._PNG_SIGNATURE + b"\x00" * 25 + ogn._PNG_IEND
+
+
+def _exr(lines=4, compression=0, filled=True, cut=0):
+    """A minimal scanline OpenEXR with one scanline per chunk (no compression)."""
+    def attr(name, kind, value):
+        return name + b"\0" + kind + b"\0" + struct.pack("<i", len(value)) + value
+    header = (ogn._EXR_MAGIC + struct.pack("<I", 2)
+              + attr(b"compression", b"compression", bytes([compression]))
+              + attr(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, 0, lines - 1))
+              + b"\0")
+    table_at = len(header)
+    chunks, offset = [], table_at + 8 * lines
+    for y in range(lines):
+        chunks.append(struct.pack("<ii", y, 4) + b"data")
+    offsets = []
+    for chunk in chunks:
+        offsets.append(offset)
+        offset += len(chunk)
+    table = struct.pack(f"<{lines}Q", *(offsets if filled else [0] * lines))
+    data = header + table + b"".join(chunks)
+    return data[:len(data) - cut] if cut else data
+
+
+class CompletionIndexTest(unittest.TestCase):
+    def test_mark_and_pending(self):
+        index = ogn._CompletionIndex(20)
+        self.assertEqual(list(index.pending()), list(range(20)))
+        self.assertTrue(index.mark(3, 1.0, 100))
+        self.assertFalse(index.mark(3, 2.0, 100))
+        for i in range(3):
+            index.mark(i, 1.5, 10)
+        self.assertEqual(index.cursor, 4)
+        self.assertEqual(index.count, 4)
+        self.assertEqual(index.bytes, 130)
+        self.assertEqual(index.sizes[3], 100)
+        self.assertEqual(next(index.pending()), 4)
+        self.assertFalse(index.complete)
+
+    def test_cursor_skips_finished_bytes(self):
+        index = ogn._CompletionIndex(20)
+        for i in range(1, 17):
+            index.mark(i, 0.0)
+        index.mark(0, 0.0)
+        self.assertEqual(index.cursor, 17)
+        self.assertEqual(list(index.pending()), [17, 18, 19])
+        for i in (17, 18, 19):
+            index.mark(i, 0.0)
+        self.assertTrue(index.complete)
+        self.assertEqual(index.cursor, 20)
+        self.assertEqual(list(index.pending()), [])
+
+    def test_take_fresh(self):
+        index = ogn._CompletionIndex(4)
+        index.mark(2, 5.0)
+        index.mark(0, 3.0)
+        self.assertEqual(index.take_fresh(), [(3.0, 0), (5.0, 2)])
+        self.assertEqual(index.take_fresh(), [])
+
+    def test_poll_completed(self):
+        with tempfile.TemporaryDirectory() as folder:
+            fs = ogn._FrameSet.from_template(os.path.join(folder, "f_####.tif"), 1, 3)
+            for i in (0, 2):
+                with open(fs.path(i), "wb") as f:
+                    f.write(b"frame")
+            open(fs.path(1), "wb").close()   # empty: not written yet
+            index = ogn._CompletionIndex(len(fs))
+            self.assertEqual(ogn._poll_completed(index, fs, 0.0, time.time()), 2)
+            self.assertEqual(list(index.pending()), [1])
+            self.assertEqual(index.bytes, 10)
+            # Files from before the watcher started do not count
+            self.assertEqual(ogn._poll_completed(ogn._CompletionIndex(len(fs)), fs, time.time() + 60, time.time()), 0)
+
+
+class FrameStatsTest(unittest.TestCase):
+    def test_streaming_stats(self):
+        stats = ogn._FrameStats()
+        self.assertFalse(stats)
+        for dt in (1.0, 2.0, 3.0):
+            stats.add(dt)
+        self.assertEqual((stats.count, stats.min, stats.max, stats.last), (3, 1.0, 3.0, 3.0))
+        self.assertAlmostEqual(stats.mean(), 2.0)
+        self.assertAlmostEqual(stats.recent_mean(), 2.0)
+        self.assertAlmostEqual(stats.estimate('EWMA'), 1.0 + 0.2 * 1.0 + 0.2 * (3.0 - 1.2))
+
+    def test_recent_window(self):
+        stats = ogn._FrameStats()
+        for _ in range(ogn._FrameStats.WINDOW):
+            stats.add(100.0)
+        for _ in range(ogn._FrameStats.WINDOW):
+            stats.add(1.0)
+        self.assertAlmostEqual(stats.estimate('RECENT'), 1.0)
+        self.assertAlmostEqual(stats.estimate('MEAN'), 50.5)
+
+
+class FrameSetTest(unittest.TestCase):
+    def test_template(self):
+        fs = ogn._FrameSet.from_template("/renders/shot_####.png", 1, 10, 3)
+        self.assertEqual(len(fs), 4)
+        self.assertIsNone(fs.paths)
+        self.assertEqual([fs.frame(i) for i in range(4)], [1, 4, 7, 10])
+        self.assertEqual(fs.path(1), os.path.abspath("/renders/shot_0004.png"))
+        self.assertEqual(fs.folders(), [os.path.abspath("/renders")])
+
+    def test_index_of(self):
+        fs = ogn._FrameSet.from_template("/r/f_###.exr", 10, 20, 2)
+        self.assertEqual(fs.index_of("f_010.exr"), 0)
+        self.assertEqual(fs.index_of("f_020.exr"), 5)
+        self.assertIsNone(fs.index_of("f_011.exr"))     # off the step
+        self.assertIsNone(fs.index_of("f_022.exr"))     # past the range
+        self.assertIsNone(fs.index_of("f_10.exr"))      # not padded
+        self.assertIsNone(fs.index_of("f_0010.exr"))    # padded too far
+        self.assertIsNone(fs.index_of("f_010.png"))
+        self.assertIsNone(fs.index_of("g_010.exr"))
+
+    def test_negative_frames_keep_blender_numbering(self):
+        # Blender pads "-2" to "-002" (the sign counts), which the template
+        # cannot express, so the set keeps the paths themselves
+        fs = ogn._FrameSet.from_template("/r/f_####.png", -2, 1)
+        self.assertEqual([os.path.basename(fs.path(i)) for i in range(len(fs))],
+                         ["f_-002.png", "f_-001.png", "f_0000.png", "f_0001.png"])
+
+    def test_number_appended_without_hashes(self):
+        fs = ogn._FrameSet.from_template("/r/f_", 5, 5)
+        self.assertEqual(os.path.basename(fs.path(0)), "f_0005")
+
+    def test_falls_back_to_a_path_list(self):
+        # Frame number in the folder name: not expressible as a template
+        fs = ogn._FrameSet.from_resolver(1, 1, 3, lambda f: f"/r/{f:04d}/img.png")
+        self.assertEqual(fs.paths, ["/r/0001/img.png", "/r/0002/img.png", "/r/0003/img.png"])
+        self.assertEqual(fs.path(2), "/r/0003/img.png")
+        self.assertEqual(fs.folders(), ["/r/0001", "/r/0002", "/r/0003"])
+
+
+class ValidatorTest(unittest.TestCase):
+    def check(self, suffix, data):
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(data)
+        self.addCleanup(os.unlink, f.name)
+        return ogn._frame_complete(f.name, len(data))
+
+    def test_png(self):
+        self.assertIs(self.check(".png", PNG), True)
+        self.assertIs(self.check(".PNG", PNG), True)
+        self.assertIs(self.check(".png", PNG[:-1]), False)
+        self.assertIs(self.check(".png", b"\0" * len(PNG)), False)
+
+    def test_jpeg(self):
+        self.assertIs(self.check(".jpg", b"\xff\xd8" + b"\0" * 10 + b"\xff\xd9"), True)
+        self.assertIs(self.check(".jpeg", b"\xff\xd8" + b"\0" * 10), False)
+
+    def test_bmp(self):
+        data = b"BM" + struct.pack("<I", 30) + b"\0" * 24
+        self.assertIs(self.check(".bmp", data), True)
+        self.assertIs(self.check(".bmp", data[:20]), False)
+
+    def test_exr(self):
+        self.assertIs(self.check(".exr", _exr()), True)
+        self.assertIs(self.check(".exr", _exr(filled=False)), False)   # offset table not written yet
+        self.assertIs(self.check(".exr", _exr(cut=3)), False)          # last chunk cut short
+        self.assertIs(self.check(".exr", _exr()[:20]), False)          # header cut short
+        self.assertIsNone(self.check(".exr", _exr(compression=42)))    # unknown compression
+
+    def test_unknown_format(self):
+        self.assertIsNone(self.check(".tif", b"II*\0"))
+        self.assertFalse(ogn._has_validator("frame.tif"))
+        self.assertTrue(ogn._has_validator("frame.EXR"))
+
+    def test_missing_file(self):
+        self.assertIs(ogn._frame_complete("/nonexistent/frame.png", 10), False)
+
+    def test_poll_skips_frames_still_being_written(self):
+        with tempfile.TemporaryDirectory() as folder:
+            fs = ogn._FrameSet.from_template(os.path.join(folder, "f_####.png"), 1, 2)
+            with open(fs.path(0), "wb") as f:
+                f.write(PNG)
+            with open(fs.path(1), "wb") as f:
+                f.write(PNG[:-4])
+            index = ogn._CompletionIndex(len(fs))
+            self.assertEqual(ogn._poll_completed(index, fs, 0.0, time.time()), 1)
+            self.assertEqual(list(index.pending()), [1])
+
+
+class FrameProfileTest(unittest.TestCase):
+    def test_profile_summary(self):
+        fs = ogn._FrameSet.from_template("/r/f_####.png", 1, 100)
+        profile = ogn._FrameProfile()
+        profile.add(0, 0.0, None)
+        for i in range(1, 100):
+            profile.add(i, float(i), float(i))
+        summary = profile.summary(fs)
+        self.assertEqual((summary["p50"], summary["p95"], summary["max"]), (50.0, 95.0, 99.0))
+        self.assertEqual([frame for frame, _ in summary["slowest"]], [100, 99, 98, 97, 96])
+
+    def test_export(self):
+        fs = ogn._FrameSet.from_template("/r/f_####.png", 10, 12)
+        index = ogn._CompletionIndex(len(fs))
+        profile = ogn._FrameProfile()
+        for i, (t, dt) in enumerate(((1.0, None), (3.5, 2.5), (4.0, 0.5))):
+            index.mark(i, t, 100 + i)
+            profile.add(i, t, dt)
+        with tempfile.TemporaryDirectory() as folder:
+            base = os.path.join(folder, "job_profile")
+            ogn._export_profile(profile, fs, index.sizes, base, 'BOTH')
+            with open(base + ".csv", encoding="utf-8") as f:
+                self.assertEqual(f.read().splitlines(), [
+                    "frame,completed_at,seconds,bytes",
+                    "10,1.000,,100", "11,3.500,2.500,101", "12,4.000,0.500,102"])
+            with open(base + ".json", encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual(data["columns"], ["frame", "completed_at", "seconds", "bytes"])
+        self.assertEqual(data["rows"], [[10, 1.0, None, 100], [11, 3.5, 2.5, 101], [12, 4.0, 0.5, 102]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+"""Webhook delivery against a local HTTP server."""
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OpenGL_Notifier as ogn
+
+
+class _Webhook(http.server.BaseHTTPRequestHandler):
+    """Discord-like webhook: logs every request and answers with a message id (or `server.reply`)."""
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server = self.server
+        with server.lock:
+            server.log.append((self.command, self.path, body, self.client_address[1]))
+            msg_id = "m%d" % len(server.log)
+        time.sleep(server.delay)
+        out = json.dumps({"id": msg_id} if server.reply is None else server.reply).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    do_POST = do_PATCH = do_GET = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class _ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Webhook)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.log = []
+        self.server.status = 200
+        self.server.delay = 0.0
+        self.server.reply = None
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = "http://127.0.0.1:%d/api/webhooks/1/token" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def requests(self):
+        with self.server.lock:
+            return [(method, path, body) for method, path, body, _ in self.server.log]
+
+
+class HTTPPoolTest(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = ogn._HTTPPool()
+        self.addCleanup(self.pool.close_all)
+
+    def test_reuses_connection(self):
+        for _ in range(3):
+            status, _headers, body = self.pool.request("POST", self.url, b"{}", {"Content-Type": "application/json"})
+            self.assertEqual(status, 200)
+            self.assertIn(b'"id"', body)
+        ports = {port for *_, port in self.server.log}
+        self.assertEqual(len(ports), 1)
+
+    def test_query_string_is_sent(self):
+        self.pool.request("POST", self.url + "?wait=true", b"{}")
+        self.assertEqual(self.requests()[0][1], "/api/webhooks/1/token?wait=true")
+
+    def test_retries_once_on_a_stale_connection(self):
+        self.pool.request("POST", self.url, b"{}")
+        key = ("http", "127.0.0.1", self.server.server_address[1])
+        conn, _ = self.pool._idle[key][0]
+
+        def broken(*args, **kwargs):
+            raise BrokenPipeError()
+        conn.request = broken
+        status, _headers, _body = self.pool.request("POST", self.url, b"{}")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(self.requests()), 2)
+
+    def test_error_status_is_returned(self):
+        self.server.status = 500
+        status, _headers, _body = self.pool.request("POST", self.url, b"{}")
+        self.assertEqual(status, 500)
+
+    def test_unreachable_host_raises(self):
+        with self.assertRaises(OSError):
+            self.pool.request("POST", "http://127.0.0.1:1/x", b"", timeout=2.0)
+
+    def test_unsupported_scheme(self):
+        with self.assertRaises(ValueError):
+            self.pool.request("GET", "ftp://127.0.0.1/x")
+
+
+class RateLimiterTest(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.limiter = ogn._RateLimiter()
+        patcher = mock.patch.object(ogn, "_RATE_LIMITER", self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rate_limited(self, is_global=False):
+        self.server.status = 429
+        self.server.reply = {"message": "You are being rate limited.", "retry_after": 0.5, "global": is_global}
+        status, _body = ogn._discord_http("POST", self.url, {"content": "x"}, "test")
+        self.assertEqual(status, 429)
+        self.assertEqual(self.limiter.counters["rate_limited"], 1)
+        self.server.status, self.server.reply = 200, None
+
+    def timed(self, method, url):
+        started = time.monotonic()
+        status, _body = ogn._discord_http(method, url, {"content": "x"}, "test")
+        self.assertEqual(status, 200)
+        return time.monotonic() - started
+
+    def test_retry_after_blocks_the_route(self):
+        self.rate_limited()
+        self.assertGreater(self.limiter.delay(self.limiter.key("POST", self.url)), 0.3)
+        self.assertEqual(self.limiter.delay(self.limiter.key("PATCH", self.url + "/messages/m1")), 0.0)
+        self.assertLess(self.timed("PATCH", self.url + "/messages/m1"), 0.3)   # other route
+        self.assertGreater(self.timed("POST", self.url), 0.3)
+
+    def test_global_limit_blocks_every_route(self):
+        self.rate_limited(is_global=True)
+        other = self.url.replace("/1/", "/2/")
+        for method, url in (("POST", self.url), ("PATCH", self.url + "/messages/m1"), ("POST", other)):
+            self.assertGreater(self.limiter.delay(self.limiter.key(method, url)), 0.3)
+        self.assertGreater(self.timed("POST", other), 0.3)
+
+    def test_progress_is_deferred_on_the_last_token(self):
+        worker = ogn._DeliveryWorker()
+        self.addCleanup(worker.stop)
+        target = ogn._discord_target(self.url, "tester")
+        worker.message_ids[1] = "m1"
+        webhook = self.limiter.key("POST", self.url)[0]
+        self.limiter._tokens[webhook] = [1.0, time.monotonic()]   # one request left
+
+        acks = []
+        worker.submit_progress(target, 1, DeliveryWorkerTest.embed("50%"), ack=lambda: acks.append("progress"))
+        self.assertTrue(_wait_for(lambda: self.limiter.counters["deferred"] or self.requests()))
+        self.assertEqual(self.requests(), [])   # kept back for the completion post
+        worker.submit("create", target, 2, DeliveryWorkerTest.embed("done"), ack=lambda: acks.append("create"))
+        self.assertTrue(_wait_for(lambda: len(acks) == 2))
+        self.assertEqual(acks, ["create", "progress"])
+        self.assertEqual([method for method, _, _ in self.requests()], ["POST", "PATCH"])
+
+
+class DeliveryWorkerTest(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = ogn._DeliveryWorker()
+        self.addCleanup(self.worker.stop)
+        self.target = ogn._discord_target(self.url, "tester")
+
+    @staticmethod
+    def embed(title, elapsed="1s"):
+        return {"title": title, "fields": [{"name": "Time elapsed", "value": elapsed, "inline": True}]}
+
+    def create(self, job_id):
+        acks = []
+        self.worker.submit("create", self.target, job_id, self.embed("start"), ack=lambda: acks.append(1))
+        self.assertTrue(_wait_for(lambda: acks), "create was not delivered")
+        return self.worker.message_ids[job_id]
+
+    def test_create_then_progress_edits_the_card(self):
+        msg_id = self.create(1)
+        self.assertEqual(list(self.worker.drain_results()), [(1, msg_id)])
+
+        acks = []
+        self.worker.submit_progress(self.target, 1, self.embed("50%"), ack=lambda: acks.append(1))
+        self.assertTrue(_wait_for(lambda: acks))
+        (post, _, created), (patch, path, edited) = self.requests()
+        self.assertEqual((post, patch), ("POST", "PATCH"))
+        self.assertEqual(path, f"/api/webhooks/1/token/messages/{msg_id}")
+        self.assertEqual(json.loads(created)["username"], "tester")
+        self.assertEqual(json.loads(edited)["embeds"][0]["title"], "50%")
+
+    def test_progress_is_coalesced(self):
+        self.create(1)
+        # Keep the worker busy so the edits pile up behind it
+        gate = threading.Event()
+        original = self.worker._deliver
+
+        def deliver(kind, *args):
+            if kind == "hold":
+                gate.wait(5)
+            else:
+                original(kind, *args)
+        self.worker._deliver = deliver
+        self.worker.queue.put(("hold", None, None, None, None, 0), ogn._DeliveryWorker.URGENT)
+
+        acks = []
+        for n in range(5):
+            self.worker.submit_progress(self.target, 1, self.embed(f"{n * 20}%"), ack=lambda: acks.append(1))
+        gate.set()
+        self.assertTrue(_wait_for(lambda: len(acks) == 5))
+        patches = [body for method, _, body in self.requests() if method == "PATCH"]
+        self.assertEqual(len(patches), 1)
+        self.assertEqual(json.loads(patches[0])["embeds"][0]["title"], "80%")
+        self.assertEqual(self.worker.counters["coalesced"], 4)
+
+    def test_unchanged_progress_is_skipped(self):
+        self.create(1)
+        acks = []
+        for elapsed in ("10s", "11s"):   # differs only in a volatile field
+            self.worker.submit_progress(self.target, 1, self.embed("50%", elapsed), ack=lambda: acks.append(1))
+            self.assertTrue(_wait_for(lambda: len(acks) == (1 if elapsed == "10s" else 2)))
+        self.assertEqual([method for method, _, _ in self.requests()], ["POST", "PATCH"])
+        self.assertEqual(self.worker.counters["unchanged"], 1)
+
+    def test_send_timeout_applies_to_discord(self):
+        self.server.delay = 1.0
+        target = ogn._discord_target(self.url, "tester", timeout=0.2)
+        started = time.monotonic()
+        self.assertIsNone(ogn._discord_post_embed(self.embed("start"), target, retries=0))
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_terminal_update_drops_pending_progress(self):
+        self.create(1)
+        acks = []
+        with self.worker._lock:
+            self.worker._pending[1] = (self.target, self.embed("stale"), lambda: acks.append("progress"))
+        self.worker.submit("update", self.target, 1, self.embed("done"), ack=lambda: acks.append("done"), final=True)
+        self.assertTrue(_wait_for(lambda: "done" in acks))
+        self.assertEqual(acks, ["progress", "done"])
+        titles = [json.loads(body)["embeds"][0]["title"] for method, _, body in self.requests() if method == "PATCH"]
+        self.assertEqual(titles, ["done"])
+
+    def test_failed_progress_is_not_retried_after_the_final_update(self):
+        self.create(1)
+        in_flight, release = threading.Event(), threading.Event()
+        sent = []
+
+        def send_card(target, job_id, embed, edit, retries=3, preview=None):
+            sent.append(embed["title"])
+            if embed["title"] == "50%":
+                in_flight.set()
+                release.wait(5)
+                return False   # e.g. a timeout, after the final update was queued
+            return True
+        self.worker._send_card = send_card
+
+        acks = []
+        self.worker.submit_progress(self.target, 1, self.embed("50%"), ack=lambda: acks.append("progress"))
+        self.assertTrue(in_flight.wait(5))
+        self.worker.submit("update", self.target, 1, self.embed("done"), ack=lambda: acks.append("done"), final=True)
+        release.set()
+        self.assertTrue(_wait_for(lambda: len(acks) == 2))
+        self.assertEqual(acks, ["progress", "done"])
+        self.assertEqual(sent, ["50%", "done"])
+        self.assertNotIn(1, self.worker._pending)
+
+        # Late progress for the finished card is dropped too
+        self.worker.submit_progress(self.target, 1, self.embed("60%"), ack=lambda: acks.append("late"))
+        self.assertEqual(acks[-1], "late")
+        self.assertNotIn(1, self.worker._pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Desktop alerts through the long-lived helper, replaced by a line logger via OPENGL_NOTIFIER_HELPER."""
+import os
+import shlex
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OpenGL_Notifier as ogn
+
+
+def _wait_for_lines(path, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+        if len(lines) >= n or time.monotonic() > deadline:
+            return lines
+        time.sleep(0.02)
+
+
+@unittest.skipIf(os.name != "posix", "the test helper is a shell command")
+class DesktopBackendTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.log = os.path.join(folder.name, "alerts.log")
+        self.sound = os.path.join(folder.name, "done.wav")
+        open(self.sound, "wb").close()
+        # The helper appends every line it gets and tags it with its pid
+        helper = f'while IFS= read -r line; do printf "%s\\t%s\\n" "$$" "$line" >> {shlex.quote(self.log)}; done'
+        patcher = mock.patch.dict(os.environ, {"OPENGL_NOTIFIER_HELPER": helper})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = ogn._DesktopBackend()
+        self.addCleanup(self.backend.stop)
+
+    def alerts(self, n):
+        return [line.split("\t", 1) for line in _wait_for_lines(self.log, n)]
+
+    def test_one_helper_for_all_alerts(self):
+        self.backend.toast("Render done")
+        self.backend.beep()
+        self.backend.sound(self.sound)
+        alerts = self.alerts(3)
+        self.assertEqual([line for _, line in alerts],
+                         ["toast\tRender done", "beep\t", f"sound\t{self.sound}"])
+        self.assertEqual(len({pid for pid, _ in alerts}), 1)
+
+    def test_message_is_kept_on_one_line(self):
+        self.backend.toast("a\tb\nc\rd")
+        self.assertEqual(self.alerts(1)[0][1], "toast\ta b c d")
+
+    def test_missing_sound_is_ignored(self):
+        self.backend.sound(self.sound + ".missing")
+        self.backend.toast("after")
+        self.assertEqual([line for _, line in self.alerts(1)], ["toast\tafter"])
+
+    def test_dead_helper_is_restarted(self):
+        self.backend.toast("first")
+        first = self.alerts(1)[0][0]
+        self.backend._proc.kill()
+        self.backend._proc.wait()
+        self.backend.toast("second")
+        alerts = self.alerts(2)
+        self.assertEqual([line for _, line in alerts], ["toast\tfirst", "toast\tsecond"])
+        self.assertNotEqual(alerts[1][0], first)
+
+    def test_falls_back_without_a_helper(self):
+        self.backend.probe()
+        self.backend.command = None
+        with mock.patch.object(ogn, "_popup_only") as popup:
+            self.backend.toast("no helper")
+        popup.assert_called_once_with("no helper")
+
+    def test_stop_ends_the_helper(self):
+        self.backend.toast("x")
+        self.alerts(1)
+        proc = self.backend._proc
+        self.backend.stop()
+        self.assertIsNotNone(proc.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""The durable outbox: slot files, progress batching, compaction, open cards and replay."""
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OpenGL_Notifier as ogn
+
+from test_delivery import _ServerTestCase, _wait_for
+
+
+def _event(stage, job_id=1, done=5):
+    return {"event": stage, "job_id": job_id, "job": "shot", "time": time.time(),
+            "stats": {"total_frames": 10, "progress_str": f"{done}/10"}, "text": None}
+
+
+class _OutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.sink = ogn._JsonlSink(os.path.join(self.folder, "events.jsonl"))
+
+    def outbox(self):
+        box = ogn._Outbox()
+        self.addCleanup(box.close)
+        return box, box.open(self.folder)
+
+    def lines(self, name="outbox.jsonl"):
+        with open(os.path.join(self.folder, name), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+
+class OutboxTest(_OutboxTestCase):
+    def test_each_instance_claims_its_own_file(self):
+        first, _ = self.outbox()
+        second, _ = self.outbox()
+        self.assertEqual(os.path.basename(first._path), "outbox.jsonl")
+        self.assertEqual(os.path.basename(second._path), "outbox-1.jsonl")
+        first.close()
+        third, _ = self.outbox()
+        self.assertEqual(os.path.basename(third._path), "outbox.jsonl")
+
+    def test_pending_entries_survive_a_restart(self):
+        box, left = self.outbox()
+        self.assertEqual(left, [])
+        start = box.add(self.sink, _event("start"))
+        done = box.add(self.sink, _event("done"))
+        box.ack(start)
+        box.close()
+        _, left = self.outbox()
+        self.assertEqual([rec["add"] for rec in left], [done])
+        self.assertEqual(left[0]["event"]["event"], "done")
+        self.assertEqual(left[0]["session"], ogn._SESSION)
+
+    def test_only_the_newest_progress_is_kept(self):
+        box, _ = self.outbox()
+        box.add(self.sink, _event("start"))
+        for n in range(3):
+            box.add(self.sink, _event("progress", done=n))
+        box.add(self.sink, _event("progress", job_id=2))
+        self.assertEqual(box.pending_count(), 3)
+        box.close()
+        _, left = self.outbox()
+        self.assertEqual([(rec["event"]["event"], rec["event"]["job_id"]) for rec in left],
+                         [("start", 1), ("progress", 1), ("progress", 2)])
+        self.assertEqual(left[1]["event"]["stats"]["progress_str"], "2/10")
+
+    def test_compaction_drops_acked_records(self):
+        box, _ = self.outbox()
+        box.COMPACT_AFTER = 5
+        keep = box.add(self.sink, _event("start"))
+        for n in range(6):
+            box.ack(box.add(self.sink, _event("done", job_id=n + 2)))
+        lines = self.lines()
+        self.assertLess(len(lines), 13)
+        box.close()
+        _, left = self.outbox()
+        self.assertEqual([rec["add"] for rec in left], [keep])
+
+    def test_torn_last_line_is_ignored(self):
+        box, _ = self.outbox()
+        entry = box.add(self.sink, _event("done"))
+        box.close()
+        with open(os.path.join(self.folder, "outbox.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"add": 99, "sess')
+        _, left = self.outbox()
+        self.assertEqual([rec["add"] for rec in left], [entry])
+
+    def test_open_card_is_acked_with_the_final_event(self):
+        box, _ = self.outbox()
+        card = box.add(self.sink, _event("canceled"), card="m1")
+        box.ack(box.add(self.sink, _event("progress")))
+        self.assertEqual(box.pending_count(), 1)
+        box.ack(box.add(self.sink, _event("done", job_id=2)))   # another job
+        self.assertEqual(box.pending_count(), 1)
+        box.ack(box.add(self.sink, _event("done")))
+        self.assertEqual(box.pending_count(), 0)
+        self.assertIn({"ack": card}, self.lines())
+
+
+class _ReplayMixin:
+    def dead_session(self, sink, events, card_after=None, card="m1"):
+        """Write `events` for `sink` as an earlier session that never acked them."""
+        with mock.patch.object(ogn, "_SESSION", "deadbeef"):
+            box, _ = self.outbox()
+            for n, event in enumerate(events):
+                entry = box.add(sink, event)
+                if event["event"] == "start":
+                    box.ack(entry)
+                if n == card_after:
+                    box.add(sink, _event("canceled", event["job_id"]), card=card)
+            box.close()
+
+    def replay(self):
+        box = ogn._Outbox()
+        self.addCleanup(box.close)
+        patcher = mock.patch.object(ogn, "_OUTBOX", box)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ogn._replay_outbox(self.folder)
+        return box
+
+
+class ReplayTest(_ReplayMixin, _OutboxTestCase):
+    def test_last_event_per_job_is_sent(self):
+        self.dead_session(self.sink, [_event("start"), _event("progress"), _event("done"),
+                                      _event("progress", job_id=2), _event("encoding", job_id=2)])
+        box = self.replay()
+        self.assertTrue(_wait_for(lambda: box.pending_count() == 0))
+        with open(self.sink.path, encoding="utf-8") as f:
+            sent = sorted((e["job_id"], e["event"]) for e in map(json.loads, f))
+        # the unfinished job is reported as canceled
+        self.assertEqual(sent, [("deadbeef:1", "done"), ("deadbeef:2", "canceled")])
+
+    def test_expired_entries_are_dropped(self):
+        self.dead_session(self.sink, [_event("done")])
+        with mock.patch.object(ogn, "_OUTBOX_MAX_AGE", -1.0):
+            box = self.replay()
+        self.assertEqual(box.pending_count(), 0)
+        self.assertFalse(os.path.exists(self.sink.path))
+
+
+class CardReplayTest(_ReplayMixin, _OutboxTestCase, _ServerTestCase):
+    def setUp(self):
+        _OutboxTestCase.setUp(self)
+        _ServerTestCase.setUp(self)
+        worker = ogn._DeliveryWorker()
+        self.addCleanup(worker.stop)
+        patcher = mock.patch.object(ogn, "_DELIVERY", worker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.discord = ogn._DiscordSink(ogn._discord_target(self.url, "tester"))
+
+    def test_card_of_a_dead_session_is_closed_in_place(self):
+        self.dead_session(self.discord, [_event("start"), _event("progress", done=7)], card_after=0, card="m42")
+        box = self.replay()
+        self.assertTrue(_wait_for(lambda: box.pending_count() == 0))
+        (method, path, body), = self.requests()
+        self.assertEqual((method, path), ("PATCH", "/api/webhooks/1/token/messages/m42"))
+        embed = json.loads(body)["embeds"][0]
+        self.assertIn("canceled", embed["title"])
+        self.assertIn("7/10", json.dumps(embed, ensure_ascii=False))
+
+    def test_open_card_alone_is_closed(self):
+        # Every event was delivered, but the job never finished
+        self.dead_session(self.discord, [_event("start")], card_after=0, card="m7")
+        box = self.replay()
+        self.assertTrue(_wait_for(lambda: box.pending_count() == 0))
+        self.assertEqual([(m, p) for m, p, _ in self.requests()], [("PATCH", "/api/webhooks/1/token/messages/m7")])
+
+    def test_card_is_posted_when_it_was_never_created(self):
+        self.dead_session(self.discord, [_event("progress")])
+        box = self.replay()
+        self.assertTrue(_wait_for(lambda: box.pending_count() == 0))
+        self.assertEqual([m for m, _, _ in self.requests()], ["POST"])
+
+
+if __name__ == "__main__":
+    unittest.main()
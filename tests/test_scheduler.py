@@ -0,0 +1,222 @@
+"""Watcher passes: the polling cadence, the disk-space warning and the heap scheduler."""
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import OpenGL_Notifier as ogn
+
+
+def _prefs(**overrides):
+    values = dict(check_interval=1.0, adaptive_polling=True, poll_floor=0.1, poll_ceiling=10.0,
+                  stable_delay=1.5, update_interval=5.0)
+    values.update(overrides)
+    return types.SimpleNamespace(**values)
+
+
+def _job(frames=10, template="/r/f_####.png", sinks=()):
+    expected = ogn._FrameSet.from_template(template, 1, frames)
+    return ogn._Job("shot", True, expected, 1, frames, 'STAT', 'MEAN', list(sinks), written_after=0.0)
+
+
+class _FakeTimers:
+    """bpy.app.timers with the calls it got."""
+    def __init__(self):
+        self.calls = []
+        self.registered = False
+
+    def register(self, func, first_interval=0.0, persistent=False):
+        self.calls.append(("register", round(first_interval, 2), persistent))
+        self.registered = True
+
+    def unregister(self, func):
+        self.calls.append(("unregister",))
+        self.registered = False
+
+    def is_registered(self, func):
+        return self.registered
+
+
+class _SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("_JOBS", {}), ("_JOB_HEAP", []), ("_TIMER_WAKE", None),
+                            ("_DELIVERY", ogn._DeliveryWorker())):
+            patcher = mock.patch.object(ogn, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class NextIntervalTest(unittest.TestCase):
+    def setUp(self):
+        self.job = _job()
+        self.now = 1000.0
+        for _ in range(3):
+            self.job.timing.add(8.0)   # a frame every 8 s
+
+    def interval(self, since_last=None, settling=False, **prefs):
+        if since_last is not None:
+            self.job.last_frame_t0 = self.now - since_last
+        return ogn._next_interval(self.job, _prefs(**prefs), self.now, settling)
+
+    def test_no_cadence_yet(self):
+        self.assertEqual(ogn._next_interval(_job(), _prefs(), self.now, False), 1.0)
+
+    def test_frame_due_soon(self):
+        self.assertAlmostEqual(self.interval(since_last=7.0), 0.5)   # halfway to the next frame
+
+    def test_long_frame_backs_off(self):
+        self.assertAlmostEqual(self.interval(since_last=0.0), 4.0)
+
+    def test_overdue_frame_eases_off(self):
+        self.assertAlmostEqual(self.interval(since_last=8.0), 2.0)    # a quarter frame
+        self.assertAlmostEqual(self.interval(since_last=40.0), 8.0)   # a quarter of the overrun
+
+    def test_settling_polls_quickly(self):
+        self.assertAlmostEqual(self.interval(since_last=0.0, settling=True), 1.5 / 4.0)
+
+    def test_floor_and_ceiling(self):
+        self.assertAlmostEqual(self.interval(since_last=7.99), 0.1)
+        self.assertAlmostEqual(self.interval(since_last=0.0, poll_ceiling=3.0), 3.0)
+        # A ceiling below the floor is raised to it
+        self.assertAlmostEqual(self.interval(since_last=0.0, poll_floor=5.0, poll_ceiling=1.0), 5.0)
+
+    def test_fixed_interval(self):
+        self.assertEqual(self.interval(since_last=0.0, adaptive_polling=False, check_interval=2.0), 2.0)
+
+    def test_render_gone_grace(self):
+        self.job.render_gone_at = self.now - 0.25
+        self.assertAlmostEqual(self.interval(since_last=0.0), ogn._RENDER_GONE_GRACE - 0.25)
+
+
+class DiskTest(unittest.TestCase):
+    def setUp(self):
+        self.free = 10_000
+        self.disk_free = ogn._disk_free
+        patcher = mock.patch.object(ogn, "_disk_free", lambda folder, now: self.free)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job_with_frames(self, *sizes):
+        job = _job()
+        job.start_time = 100.0
+        for i, size in enumerate(sizes):
+            job.completion.mark(i, 101.0 + i, size)
+        job.last_frame_t0 = 100.0 + len(sizes)
+        return job
+
+    def test_needs_a_few_frames(self):
+        self.assertEqual(ogn._disk_stats(self.job_with_frames(100), 200.0), {})
+
+    def test_projection_against_free_space(self):
+        job = self.job_with_frames(100, 100)   # 8 frames of 100 bytes to go, padded by 10 %
+        stats = ogn._disk_stats(job, 200.0)
+        self.assertFalse(stats["disk_at_risk"])
+        self.assertEqual(stats["disk_need_str"], ogn._human_bytes(880))
+        self.assertIn("100 B/s", stats["throughput_str"])
+        self.free = 879
+        self.assertTrue(ogn._disk_stats(job, 200.0)["disk_at_risk"])
+        self.free = 881
+        self.assertFalse(ogn._disk_stats(job, 200.0)["disk_at_risk"])
+
+    def test_unknown_free_space(self):
+        self.free = None
+        stats = ogn._disk_stats(self.job_with_frames(100, 100), 200.0)
+        self.assertIn("throughput_str", stats)
+        self.assertNotIn("disk_at_risk", stats)
+
+    def test_free_space_is_read_at_most_every_check_interval(self):
+        usage = mock.Mock(return_value=types.SimpleNamespace(free=123))
+        with mock.patch.object(ogn, "_DISK_FREE", {}), mock.patch.object(ogn.shutil, "disk_usage", usage):
+            self.assertEqual(self.disk_free("/r", 0.0), 123)
+            self.disk_free("/r", ogn._DISK_CHECK_INTERVAL - 1)
+            self.assertEqual(usage.call_count, 1)
+            self.disk_free("/r", ogn._DISK_CHECK_INTERVAL)
+            self.assertEqual(usage.call_count, 2)
+
+    def test_at_risk_is_published_once_per_job(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        job = _job(template=os.path.join(folder.name, "f_####.png"), sinks=[object()])
+        published = []
+        frame = ogn._PNG_SIGNATURE + b"\0" * 25 + ogn._PNG_IEND
+        for i, free in enumerate((0, 0, 10_000, 0)):   # too few frames, at risk, space freed, at risk again
+            self.free = free
+            with open(job.expected.path(i), "wb") as f:
+                f.write(frame)
+            with mock.patch.object(ogn, "_publish", lambda job, stage, stats, text=None: published.append((i, stage))):
+                ogn._tick_job(job, _prefs(), time.time())
+        self.assertEqual([tick for tick, stage in published if stage == "at_risk"], [1])
+        self.assertTrue(job.disk_warned)
+
+
+class SchedulerTest(_SchedulerTestCase):
+    def run_timer(self, intervals):
+        """One scheduler pass where each job's tick returns intervals[job id]."""
+        ticked = []
+
+        def tick(job, pf, now):
+            ticked.append(job.id)
+            return intervals[job.id]
+        with mock.patch.object(ogn, "_config", _prefs), mock.patch.object(ogn, "_tick_job", tick):
+            return ogn._scheduler_timer(), ticked
+
+    def arm(self, delay):
+        job = _job()
+        ogn._arm_job(job, delay)
+        return job
+
+    def test_only_due_jobs_are_ticked(self):
+        due, later = self.arm(0.0), self.arm(60.0)
+        wait, ticked = self.run_timer({due.id: 2.0})
+        self.assertEqual(ticked, [due.id])
+        self.assertAlmostEqual(wait, 2.0, delta=0.1)
+        self.assertAlmostEqual(ogn._TIMER_WAKE, time.time() + 2.0, delta=0.1)
+        self.assertAlmostEqual(due.next_due, time.time() + 2.0, delta=0.1)
+        self.assertGreater(later.next_due, time.time() + 50)
+
+    def test_stale_heap_entries_are_skipped(self):
+        job = self.arm(0.0)
+        ogn._schedule(job, time.time() - 1.0)   # rescheduled: the first entry is stale
+        _wait, ticked = self.run_timer({job.id: 5.0})
+        self.assertEqual(ticked, [job.id])
+
+    def test_finished_jobs_stop_the_timer(self):
+        job = self.arm(0.0)
+        ogn._drop_job(self.arm(0.0))   # canceled before its first pass
+        wait, ticked = self.run_timer({job.id: None})
+        self.assertEqual(ticked, [job.id])
+        self.assertIsNone(wait)
+        self.assertIsNone(ogn._TIMER_WAKE)
+        self.assertEqual(ogn._JOB_HEAP, [])
+
+
+class ArmJobTest(_SchedulerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.timers = _FakeTimers()
+        patcher = mock.patch.object(ogn, "bpy", types.SimpleNamespace(app=types.SimpleNamespace(timers=self.timers)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timer_is_registered_persistent(self):
+        ogn._arm_job(_job(), 5.0)
+        self.assertEqual(self.timers.calls, [("register", 5.0, True)])
+
+    def test_later_job_leaves_the_timer_alone(self):
+        ogn._arm_job(_job(), 5.0)
+        ogn._arm_job(_job(), 8.0)
+        self.assertEqual(self.timers.calls, [("register", 5.0, True)])
+
+    def test_sooner_job_brings_the_timer_forward(self):
+        ogn._arm_job(_job(), 5.0)   # the timer has backed off
+        ogn._arm_job(_job(), 0.1)
+        self.assertEqual(self.timers.calls, [("register", 5.0, True), ("unregister",), ("register", 0.1, True)])
+        self.assertAlmostEqual(ogn._TIMER_WAKE, time.time() + 0.1, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()